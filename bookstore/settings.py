@@ -44,6 +44,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'inventory.middleware.LoadSheddingMiddleware',
+    'inventory.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -138,8 +140,57 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 5,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'inventory.renderers.FastJSONRenderer',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'inventory.throttling.ClientRateThrottle',
+        'inventory.throttling.ActionRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'client': os.environ.get('THROTTLE_RATE_CLIENT', '600/min'),
+        'books-list': os.environ.get('THROTTLE_RATE_BOOKS_LIST', '120/min'),
+        'books-write': os.environ.get('THROTTLE_RATE_BOOKS_WRITE', '60/min'),
+        'books-bulk': os.environ.get('THROTTLE_RATE_BOOKS_BULK', '10/min'),
+        'calculate-price': os.environ.get('THROTTLE_RATE_CALCULATE_PRICE', '20/min'),
+    },
+}
+
+# Cache para los throttles: LocMem es por proceso; para compartir los límites
+# entre workers usar un backend compartido (p. ej. THROTTLE_CACHE_BACKEND=
+# django.core.cache.backends.db.DatabaseCache con THROTTLE_CACHE_LOCATION=throttle_cache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': os.environ.get(
+            'THROTTLE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('THROTTLE_CACHE_LOCATION', 'throttle'),
+    },
+}
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+# Compresión gzip/brotli de respuestas a partir de MIN_SIZE bytes
+RESPONSE_COMPRESSION = {
+    'PATH_PREFIX': '/api/',
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 4,
+    'CACHE_ALIAS': 'default',
+    'CACHE_TIMEOUT': 300,
+}
+
+# Descarte de carga: 503 + Retry-After cuando el proceso se satura
+LOAD_SHEDDING = {
+    'ENABLED': True,
+    'PATH_PREFIX': '/api/',
+    'MAX_IN_FLIGHT': int(os.environ.get('LOAD_SHEDDING_MAX_IN_FLIGHT', 64)),
+    'LATENCY_THRESHOLD_MS': int(os.environ.get('LOAD_SHEDDING_LATENCY_MS', 2000)),
+    'COOLDOWN_SECONDS': 5,
+    'MIN_SAMPLES': int(os.environ.get('LOAD_SHEDDING_MIN_SAMPLES', 20)),
+    # Acciones lentas por diseño que no deben disparar el descarte
+    'LATENCY_EXCLUDE': [r'/calculate-price/$', r'^/api/books/bulk-(delete|update)/$'],
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -168,4 +219,6 @@ if 'test' in sys.argv:
     DATABASES['default'] = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
-    }
\ No newline at end of file
+    }
+    # Sin throttling global en las pruebas; ThrottlingTest lo habilita explícitamente
+    REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = []
\ No newline at end of file
@@ -1,3 +1,133 @@
-from django.contrib import admin
+from decimal import Decimal
 
-# Register your models here.
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import pricing
+from .history import HistoryBuffer
+from .models import Book
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginador que evita COUNT(*) sobre la tabla completa en MySQL.
+
+    Sin filtros usa la estimación de filas de ``information_schema``; con
+    filtros el COUNT se resuelve con los índices de categoría y país.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where and connection.vendor == 'mysql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [self.object_list.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0]:
+                return row[0]
+        return super().count
+
+
+class BookActionForm(ActionForm):
+    amount = forms.IntegerField(
+        required=False, label='Cantidad',
+        help_text='Unidades a sumar (o restar) al ajustar stock'
+    )
+    category = forms.CharField(required=False, max_length=100, label='Nueva categoría')
+
+
+@admin.register(Book)
+class BookAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'isbn', 'title', 'author', 'category', 'supplier_country',
+        'stock_quantity', 'cost_usd', 'selling_price_local'
+    )
+    list_filter = ('category', 'supplier_country')
+    search_fields = ('isbn',)
+    search_help_text = 'Búsqueda exacta por ISBN'
+    readonly_fields = ('selling_price_local', 'created_at', 'updated_at')
+    # Solo se ordena por la clave primaria para que cada página use el índice
+    ordering = ('-id',)
+    sortable_by = ('id',)
+    list_per_page = 100
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = BookActionForm
+    actions = ('reprice', 'adjust_stock', 'recategorize')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # selling_price_local es de solo lectura aquí; solo puede cambiar el stock
+        if not change or 'stock_quantity' in form.changed_data:
+            with HistoryBuffer() as history:
+                history.stock(obj.id, obj.stock_quantity)
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(isbn=search_term), False
+
+    @admin.action(description='Recalcular precio de venta con la tasa actual')
+    def reprice(self, request, queryset):
+        # Sin tasa no se recalcula: la tasa por defecto afectaría a toda la selección
+        try:
+            exchange_rate = pricing.fetch_exchange_rate()
+        except pricing.ExchangeRateUnavailable as e:
+            self.message_user(request, f'{e}. No se modificaron precios', messages.ERROR)
+            return
+        factor = Decimal(str(pricing.calculate_selling_price(1, exchange_rate)[1]))
+        with transaction.atomic():
+            updated = queryset.update(
+                selling_price_local=Round(F('cost_usd') * factor, 2), updated_at=timezone.now()
+            )
+            self._record_history(queryset, 'selling_price_local', exchange_rate)
+        self.message_user(request, f'{updated} libros recalculados con tasa {exchange_rate}')
+
+    @admin.action(description='Ajustar stock en la cantidad indicada')
+    def adjust_stock(self, request, queryset):
+        amount = self._action_value(request, 'amount')
+        if not amount:
+            self.message_user(request, 'Indique una cantidad distinta de 0', messages.ERROR)
+            return
+        with transaction.atomic():
+            updated = queryset.update(
+                stock_quantity=Greatest(F('stock_quantity') + amount, 0), updated_at=timezone.now()
+            )
+            self._record_history(queryset, 'stock_quantity')
+        self.message_user(request, f'Stock ajustado en {updated} libros')
+
+    @admin.action(description='Cambiar a la categoría indicada')
+    def recategorize(self, request, queryset):
+        category = self._action_value(request, 'category')
+        if not category:
+            self.message_user(request, 'Indique la nueva categoría', messages.ERROR)
+            return
+        updated = queryset.update(category=category, updated_at=timezone.now())
+        self.message_user(request, f'{updated} libros movidos a {category}')
+
+    def _record_history(self, queryset, field, exchange_rate=None):
+        """Registra en el historial los valores que dejó el UPDATE masivo."""
+        with HistoryBuffer() as history:
+            for book_id, value in queryset.values_list('id', field).iterator(chunk_size=2000):
+                if field == 'stock_quantity':
+                    history.stock(book_id, value)
+                else:
+                    history.price(book_id, value, exchange_rate)
+
+    def _action_value(self, request, field):
+        form = self.action_form(request.POST)
+        form.fields['action'].choices = self.get_action_choices(request)
+        if not form.is_valid():
+            return None
+        return form.cleaned_data[field]
@@ -0,0 +1,4 @@
+from .encoding import run_encoding_benchmark
+from .runner import SCENARIOS, run_benchmarks
+
+__all__ = ['SCENARIOS', 'run_benchmarks', 'run_encoding_benchmark']
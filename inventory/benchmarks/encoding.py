@@ -0,0 +1,83 @@
+import gzip
+import time
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from inventory.middleware import COMPRESSION_DEFAULTS
+from inventory.models import Book
+from inventory.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from inventory.serializers import BookSerializer
+
+from .runner import percentile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _sample_page(rows):
+    now = timezone.now()
+    books = [
+        Book(
+            id=i + 1,
+            title=f'Sombra de viento {i}',
+            author='Gabriel García Márquez',
+            isbn=f'9799{i:09d}',
+            cost_usd=Decimal('15.99'),
+            selling_price_local=Decimal('816.51'),
+            stock_quantity=i % 50,
+            category='Literatura Clásica',
+            supplier_country='ES',
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(rows)
+    ]
+    return {
+        'count': rows,
+        'next': None,
+        'previous': None,
+        'results': BookSerializer(books, many=True).data,
+    }
+
+
+def _time(func, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+    }
+
+
+def run_encoding_benchmark(rows=1000, iterations=50):
+    """Compara tiempo de codificación y bytes transferidos para una página de ``rows`` libros."""
+    page = _sample_page(rows)
+    renderers = {'json': JSONRenderer()}
+    if orjson is not None:
+        renderers['json-orjson'] = FastJSONRenderer()
+    if msgpack is not None:
+        renderers['msgpack'] = MessagePackRenderer()
+
+    results = {}
+    for name, renderer in renderers.items():
+        body = renderer.render(page, renderer.media_type, {})
+        result = {'encode': _time(lambda: renderer.render(page, renderer.media_type, {}), iterations),
+                  'bytes': len(body)}
+
+        level = COMPRESSION_DEFAULTS['GZIP_LEVEL']
+        result['gzip'] = _time(lambda: gzip.compress(body, compresslevel=level, mtime=0), iterations)
+        result['gzip']['bytes'] = len(gzip.compress(body, compresslevel=level, mtime=0))
+        if brotli is not None:
+            quality = COMPRESSION_DEFAULTS['BROTLI_QUALITY']
+            result['br'] = _time(lambda: brotli.compress(body, quality=quality), iterations)
+            result['br']['bytes'] = len(brotli.compress(body, quality=quality))
+        results[name] = result
+
+    return {'rows': rows, 'iterations': iterations, 'renderers': results}
@@ -0,0 +1,241 @@
+import math
+import platform
+import random
+import subprocess
+import time
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from inventory.models import Book
+from inventory.views import BookViewSet
+
+# Los libros del benchmark usan el tramo 979-99, sin asignar y reservado
+# fuera del rango de seed_books; solo se eliminan los ISBN de la corrida actual
+BENCH_ISBN_PREFIX = '97999'
+STUB_EXCHANGE_RATE = 36.5
+
+
+def _bench_isbn(sequence):
+    return f'{BENCH_ISBN_PREFIX}{sequence:08d}'
+
+
+class BenchmarkContext:
+    """Estado compartido entre escenarios durante una corrida."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.client = APIClient()
+        self.book_ids = list(
+            Book.objects.exclude(isbn__startswith=BENCH_ISBN_PREFIX)
+            .values_list('id', flat=True)[:1000]
+        )
+        self.total_books = Book.objects.count()
+        sample = Book.objects.exclude(isbn__startswith=BENCH_ISBN_PREFIX).first()
+        self.sample_category = sample.category if sample else 'Ficción'
+        self.sample_country = sample.supplier_country if sample else 'ES'
+        self.sample_author = sample.author.split()[-1] if sample else 'García'
+        self.fixture_ids = []
+        self.isbns = []
+        # Se continúa tras el último ISBN de benchmark existente (p. ej. de una corrida interrumpida)
+        last = (
+            Book.objects.filter(isbn__startswith=BENCH_ISBN_PREFIX)
+            .order_by('-isbn').values_list('isbn', flat=True).first()
+        )
+        self.sequence = int(last[len(BENCH_ISBN_PREFIX):]) if last else 0
+
+    def next_isbn(self):
+        self.sequence += 1
+        isbn = _bench_isbn(self.sequence)
+        self.isbns.append(isbn)
+        return isbn
+
+    def book_payload(self):
+        return {
+            'title': 'Libro de benchmark',
+            'author': 'Autor Benchmark',
+            'isbn': self.next_isbn(),
+            'cost_usd': '12.50',
+            'stock_quantity': self.rng.randint(0, 100),
+            'category': self.sample_category,
+            'supplier_country': self.sample_country,
+        }
+
+    def create_fixtures(self, count):
+        books = [Book(**{**self.book_payload(), 'cost_usd': Decimal('12.50')}) for _ in range(count)]
+        Book.objects.bulk_create(books)
+        self.fixture_ids = list(
+            Book.objects.filter(isbn__in=[book.isbn for book in books]).values_list('id', flat=True)
+        )
+
+    def cleanup(self, chunk_size=500):
+        """Elimina únicamente los libros creados durante esta corrida."""
+        for i in range(0, len(self.isbns), chunk_size):
+            Book.objects.filter(isbn__in=self.isbns[i:i + chunk_size]).delete()
+        self.isbns = []
+
+    def any_book_id(self):
+        return self.rng.choice(self.book_ids or self.fixture_ids)
+
+    def any_fixture_id(self):
+        return self.rng.choice(self.fixture_ids)
+
+
+def _list(ctx):
+    return 'get', reverse('book-list'), None
+
+
+def _deep_pagination(ctx):
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 1
+    last_page = max(1, math.ceil(ctx.total_books / page_size))
+    return 'get', reverse('book-list'), {'page': last_page}
+
+
+def _search(ctx):
+    return 'get', reverse('book-list'), {'search': ctx.sample_author}
+
+
+def _filter(ctx):
+    return 'get', reverse('book-list'), {
+        'category': ctx.sample_category,
+        'supplier_country': ctx.sample_country,
+    }
+
+
+def _threshold(ctx):
+    return 'get', reverse('book-list'), {'threshold': 5}
+
+
+def _detail(ctx):
+    return 'get', reverse('book-detail', kwargs={'pk': ctx.any_book_id()}), None
+
+
+def _create(ctx):
+    return 'post', reverse('book-list'), ctx.book_payload()
+
+
+def _update(ctx):
+    url = reverse('book-detail', kwargs={'pk': ctx.any_fixture_id()})
+    return 'patch', url, {'stock_quantity': ctx.rng.randint(0, 100)}
+
+
+def _calculate_price(ctx):
+    return 'post', reverse('book-calculate-price', kwargs={'pk': ctx.any_fixture_id()}), None
+
+
+SCENARIOS = {
+    'list': _list,
+    'deep-pagination': _deep_pagination,
+    'search': _search,
+    'filter': _filter,
+    'threshold': _threshold,
+    'detail': _detail,
+    'create': _create,
+    'update': _update,
+    'calculate-price': _calculate_price,
+}
+
+
+def percentile(values, pct):
+    """Percentil por el método de rango más cercano."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _stub_exchange_rate_api():
+    response = Mock()
+    response.json.return_value = {'rates': {'VES': STUB_EXCHANGE_RATE}}
+    response.raise_for_status = Mock()
+    return patch('inventory.pricing.requests.get', return_value=response)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            cwd=settings.BASE_DIR, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _run_scenario(ctx, build_request, iterations, warmup):
+    timings = []
+    queries = []
+    statuses = {}
+    for i in range(warmup + iterations):
+        method, url, data = build_request(ctx)
+        kwargs = {'format': 'json'} if method != 'get' else {}
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(ctx.client, method)(url, data, **kwargs)
+            elapsed = time.perf_counter() - started
+        if i < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(len(captured.captured_queries))
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    return {
+        'requests': iterations,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2),
+        'max_queries': max(queries),
+        'status_codes': {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+def run_benchmarks(scenarios=None, iterations=50, warmup=5, seed=0):
+    """Ejecuta los escenarios indicados contra la base de datos configurada.
+
+    Devuelve un diccionario serializable a JSON con p50/p95/p99 y consultas
+    SQL por petición para cada escenario, junto con metadatos de la corrida
+    para poder comparar resultados entre commits.
+    """
+    names = list(scenarios or SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Escenarios desconocidos: {', '.join(unknown)}")
+    if iterations < 1:
+        raise ValueError('iterations debe ser mayor a 0')
+
+    ctx = BenchmarkContext(random.Random(seed))
+    results = {}
+    try:
+        ctx.create_fixtures(max(10, min(iterations, 100)))
+        # Se miden los endpoints sin throttling ni descarte de carga
+        with _stub_exchange_rate_api(), \
+                patch.object(BookViewSet, 'throttle_classes', []), \
+                override_settings(LOAD_SHEDDING={'ENABLED': False}):
+            for name in names:
+                results[name] = _run_scenario(ctx, SCENARIOS[name], iterations, warmup)
+    finally:
+        ctx.cleanup()
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'book_count': ctx.total_books,
+            'iterations': iterations,
+            'warmup': warmup,
+            'seed': seed,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'scenarios': results,
+    }
@@ -0,0 +1,122 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BookHistory, BookHistoryDaily
+
+FIELD_NAMES = dict(BookHistory.FIELD_CHOICES)
+
+
+class HistoryBuffer:
+    """Acumula filas de historial y las inserta en lotes con bulk_create.
+
+    Uso::
+
+        with HistoryBuffer() as history:
+            history.price(book.id, book.selling_price_local, exchange_rate)
+
+    Las filas pendientes se insertan al salir del bloque sin errores o al
+    llegar a ``batch_size``.
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.rows = []
+        self.ts = timezone.now()
+
+    def add(self, book_id, field, value, exchange_rate=None):
+        if value is None:
+            return
+        self.rows.append(BookHistory(
+            book_id=book_id, ts=self.ts, field=field, value=value,
+            exchange_rate=round(Decimal(str(exchange_rate)), 6) if exchange_rate is not None else None
+        ))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def price(self, book_id, value, exchange_rate=None):
+        if value is None:
+            return
+        self.add(book_id, BookHistory.FIELD_PRICE, round(Decimal(str(value)), 2), exchange_rate)
+
+    def stock(self, book_id, value):
+        self.add(book_id, BookHistory.FIELD_STOCK, value)
+
+    def flush(self):
+        if self.rows:
+            BookHistory.objects.bulk_create(self.rows, batch_size=self.batch_size)
+            self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+
+def compact(cutoff, chunk_size=500):
+    """Agrega el historial anterior a ``cutoff`` en filas diarias y borra las filas originales.
+
+    Se procesa por bloques de ``chunk_size`` libros, cada uno en su propia
+    transacción. Devuelve (filas compactadas, filas diarias escritas).
+    """
+    raw_total = daily_total = 0
+    last_book_id = 0
+    while True:
+        book_ids = list(
+            BookHistory.objects.filter(ts__lt=cutoff, book_id__gt=last_book_id)
+            .order_by('book_id').values_list('book_id', flat=True).distinct()[:chunk_size]
+        )
+        if not book_ids:
+            break
+
+        with transaction.atomic():
+            rows = (
+                BookHistory.objects.filter(book_id__in=book_ids, ts__lt=cutoff)
+                .order_by('book_id', 'field', 'ts', 'id')
+                .values_list('book_id', 'field', 'ts', 'value')
+            )
+            daily = {}
+            raw = 0
+            for book_id, field, ts, value in rows.iterator(chunk_size=5000):
+                raw += 1
+                key = (book_id, timezone.localdate(ts), field)
+                agg = daily.get(key)
+                if agg is None:
+                    daily[key] = {'open': value, 'close': value, 'min': value, 'max': value, 'samples': 1}
+                else:
+                    agg['close'] = value
+                    agg['min'] = min(agg['min'], value)
+                    agg['max'] = max(agg['max'], value)
+                    agg['samples'] += 1
+
+            # Filas diarias de compactaciones anteriores para los mismos días
+            existing = {
+                (row.book_id, row.day, row.field): row
+                for row in BookHistoryDaily.objects.filter(
+                    book_id__in=book_ids, day__in={day for _, day, _ in daily}
+                )
+            }
+            to_create, to_update = [], []
+            for (book_id, day, field), agg in daily.items():
+                row = existing.get((book_id, day, field))
+                if row is None:
+                    to_create.append(BookHistoryDaily(book_id=book_id, day=day, field=field, **agg))
+                else:
+                    row.close = agg['close']
+                    row.min = min(row.min, agg['min'])
+                    row.max = max(row.max, agg['max'])
+                    row.samples += agg['samples']
+                    to_update.append(row)
+            BookHistoryDaily.objects.bulk_create(to_create, batch_size=1000)
+            BookHistoryDaily.objects.bulk_update(
+                to_update, ['close', 'min', 'max', 'samples'], batch_size=1000
+            )
+            BookHistory.objects.filter(book_id__in=book_ids, ts__lt=cutoff).delete()
+
+        raw_total += raw
+        daily_total += len(daily)
+        last_book_id = book_ids[-1]
+    return raw_total, daily_total
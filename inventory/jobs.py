@@ -0,0 +1,242 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import pricing
+from .history import HistoryBuffer
+from .models import Book, Job
+from .serializers import RepricePayloadSerializer
+
+logger = logging.getLogger(__name__)
+
+# Tipo de tarea -> función que la ejecuta; ver register()
+HANDLERS = {}
+# Tipo de tarea -> serializer que valida su payload al encolarla
+PAYLOAD_SERIALIZERS = {}
+
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 6 * 60 * 60
+MAX_ATTEMPTS_LIMIT = 20
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLockLost(Exception):
+    """La tarea fue reencolada o tomada por otro worker mientras se ejecutaba."""
+
+
+def register(kind, payload_serializer=None):
+    """Registra una función como ejecutora de las tareas de tipo ``kind``.
+
+    La función recibe un JobContext y devuelve un resultado serializable a
+    JSON. Debe trabajar por bloques y llamar a ``ctx.save_checkpoint`` tras
+    cada uno, para poder reanudar tras un reintento y atender cancelaciones.
+    Si se indica ``payload_serializer``, el payload se valida al encolar.
+    """
+    def decorator(func):
+        HANDLERS[kind] = func
+        if payload_serializer is not None:
+            PAYLOAD_SERIALIZERS[kind] = payload_serializer
+        return func
+    return decorator
+
+
+def clean_payload(kind, payload):
+    """Valida el payload de una tarea; lanza serializers.ValidationError si no es válido."""
+    serializer_class = PAYLOAD_SERIALIZERS.get(kind)
+    if serializer_class is None:
+        return payload
+    serializer = serializer_class(data=payload)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+class JobContext:
+    def __init__(self, job):
+        self.job = job
+
+    @property
+    def payload(self):
+        return self.job.payload
+
+    @property
+    def state(self):
+        return self.job.checkpoint
+
+    def save_checkpoint(self, state, processed=None, total=None):
+        """Guarda el avance y lanza JobCancelled si se pidió cancelar la tarea.
+
+        Lanza JobLockLost si este worker ya no es dueño de la tarea.
+        """
+        self.job.checkpoint = state
+        fields = {'checkpoint': state, 'updated_at': timezone.now()}
+        if processed is not None:
+            self.job.processed = fields['processed'] = processed
+        if total is not None:
+            self.job.total = fields['total'] = total
+        if not _owned(self.job).update(**fields):
+            raise JobLockLost()
+
+        if Job.objects.filter(pk=self.job.pk, cancel_requested=True).exists():
+            raise JobCancelled()
+
+
+def _owned(job):
+    """La tarea, solo si sigue en ejecución a nombre del worker que la tomó."""
+    return Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING, locked_by=job.locked_by)
+
+
+def retry_delay(attempts):
+    """Segundos de espera antes del siguiente intento: exponencial, con tope en RETRY_MAX_SECONDS."""
+    return min(RETRY_BASE_SECONDS * 2 ** min(attempts - 1, 32), RETRY_MAX_SECONDS)
+
+
+def enqueue(kind, payload=None, max_attempts=3):
+    if kind not in HANDLERS:
+        raise ValueError(f"Tipo de tarea desconocido: {kind}")
+    if not 1 <= max_attempts <= MAX_ATTEMPTS_LIMIT:
+        raise ValueError(f"max_attempts debe estar entre 1 y {MAX_ATTEMPTS_LIMIT}")
+    try:
+        payload = clean_payload(kind, payload or {})
+    except ValidationError as e:
+        raise ValueError(f"Payload inválido para {kind}: {e.detail}")
+    return Job.objects.create(kind=kind, payload=payload, max_attempts=max_attempts)
+
+
+def claim_next(worker_id):
+    """Toma la siguiente tarea pendiente; la actualización condicional evita que dos workers tomen la misma."""
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status=Job.STATUS_PENDING, run_after__lte=now)
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = Job.objects.filter(pk=job_id, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker_id,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            updated_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def requeue_stale(older_than):
+    """Devuelve a pendiente las tareas cuyo worker dejó de reportar avance.
+
+    Las que ya agotaron sus intentos se marcan como fallidas. Devuelve
+    (reencoladas, fallidas).
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, updated_at__lt=now - older_than)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.STATUS_FAILED, error='Se agotaron los intentos: el worker dejó de reportar avance',
+        locked_by='', finished_at=now, updated_at=now
+    )
+    requeued = stale.update(status=Job.STATUS_PENDING, locked_by='', updated_at=now)
+    return requeued, failed
+
+
+def cancel(job):
+    """Cancela una tarea pendiente de inmediato, o pide al worker que detenga una en ejecución."""
+    now = timezone.now()
+    if Job.objects.filter(pk=job.pk, status=Job.STATUS_PENDING).update(
+        status=Job.STATUS_CANCELLED, cancel_requested=True, finished_at=now, updated_at=now
+    ):
+        return True
+    return bool(Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING).update(
+        cancel_requested=True, updated_at=now
+    ))
+
+
+def run_job(job):
+    handler = HANDLERS.get(job.kind)
+    now = timezone.now()
+    if handler is None:
+        _owned(job).update(
+            status=Job.STATUS_FAILED, error=f"Tipo de tarea desconocido: {job.kind}",
+            finished_at=now, updated_at=now
+        )
+        return
+
+    try:
+        result = handler(JobContext(job))
+    except JobLockLost:
+        logger.warning(f"Job {job.pk} ({job.kind}) was taken over by another worker; stopping")
+    except JobCancelled:
+        _owned(job).update(
+            status=Job.STATUS_CANCELLED, locked_by='', finished_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+    except Exception as e:
+        logger.error(f"Error running job {job.pk} ({job.kind}), attempt {job.attempts}: {e}")
+        fields = {'error': str(e), 'locked_by': '', 'updated_at': timezone.now()}
+        if job.attempts < job.max_attempts:
+            # Reintento con espera exponencial; el checkpoint se conserva para reanudar
+            fields['status'] = Job.STATUS_PENDING
+            fields['run_after'] = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            fields['status'] = Job.STATUS_FAILED
+            fields['finished_at'] = timezone.now()
+        _owned(job).update(**fields)
+    else:
+        if not _owned(job).update(
+            status=Job.STATUS_SUCCEEDED, result=result, error='', locked_by='',
+            finished_at=timezone.now(), updated_at=timezone.now()
+        ):
+            logger.warning(f"Job {job.pk} ({job.kind}) finished after losing its lock; result discarded")
+
+
+@register('reprice', payload_serializer=RepricePayloadSerializer)
+def reprice_books(ctx):
+    """Recalcula selling_price_local por bloques con una única tasa de cambio.
+
+    Payload opcional: ``category`` y ``supplier_country`` para acotar los
+    libros, y ``chunk_size`` (por defecto 1000). Si la API de tasas falla la
+    tarea se reintenta en lugar de aplicar la tasa por defecto.
+    """
+    state = dict(ctx.state)
+    if 'exchange_rate' not in state:
+        # La tasa se fija en el primer intento para que los reintentos sean consistentes
+        state['exchange_rate'] = pricing.fetch_exchange_rate()
+        state['last_id'] = 0
+    exchange_rate = state['exchange_rate']
+    chunk_size = ctx.payload.get('chunk_size', 1000)
+
+    queryset = Book.objects.all()
+    if ctx.payload.get('category'):
+        queryset = queryset.filter(category=ctx.payload['category'])
+    if ctx.payload.get('supplier_country'):
+        queryset = queryset.filter(supplier_country=ctx.payload['supplier_country'])
+    total = queryset.count()
+    processed = ctx.job.processed
+
+    while True:
+        books = list(
+            queryset.filter(pk__gt=state['last_id']).order_by('pk').only('id', 'cost_usd')[:chunk_size]
+        )
+        if not books:
+            break
+        now = timezone.now()
+        with transaction.atomic(), HistoryBuffer() as history:
+            for book in books:
+                book.selling_price_local = round(
+                    pricing.calculate_selling_price(book.cost_usd, exchange_rate)[1], 2
+                )
+                book.updated_at = now
+                history.price(book.id, book.selling_price_local, exchange_rate)
+            Book.objects.bulk_update(books, ['selling_price_local', 'updated_at'])
+        processed += len(books)
+        state['last_id'] = books[-1].pk
+        ctx.save_checkpoint(state, processed=processed, total=total)
+
+    return {'updated': processed, 'exchange_rate': exchange_rate}
@@ -0,0 +1,27 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory import history
+
+
+class Command(BaseCommand):
+    help = 'Agrega el historial de precio y stock antiguo en filas diarias y borra las filas originales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=90)
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Cantidad de libros procesados por transacción')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--older-than-days y --chunk-size deben ser mayores a 0')
+
+        # Se compactan días completos: el corte es la medianoche local
+        cutoff_day = timezone.localdate() - timedelta(days=options['older_than_days'])
+        cutoff = timezone.make_aware(datetime.combine(cutoff_day, time.min))
+        raw, daily = history.compact(cutoff, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Se compactaron {raw} registros en {daily} agregados diarios (anteriores a {cutoff_day})'
+        ))
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.benchmarks import SCENARIOS, run_benchmarks, run_encoding_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia (p50/p95/p99) y consultas SQL por petición de los endpoints de libros'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            choices=list(SCENARIOS),
+                            help='Escenario a ejecutar (se puede repetir); por defecto todos')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--encodings', action='store_true',
+                            help='Compara JSON/orjson/MessagePack y gzip/brotli para una página de 1000 libros; '
+                                 'sin --scenario no ejecuta los escenarios de endpoints')
+        parser.add_argument('--output', help='Archivo donde guardar el reporte JSON')
+
+    def handle(self, *args, **options):
+        report = {}
+        # --encodings solo no toca la base de datos: no crea ni borra libros de prueba
+        if options['scenarios'] or not options['encodings']:
+            try:
+                report = run_benchmarks(
+                    scenarios=options['scenarios'],
+                    iterations=options['iterations'],
+                    warmup=options['warmup'],
+                    seed=options['seed'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+        if options['encodings']:
+            report['encodings'] = run_encoding_benchmark(iterations=options['iterations'])
+
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Reporte guardado en {options['output']}"))
+        else:
+            self.stdout.write(payload)
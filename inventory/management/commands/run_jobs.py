@@ -0,0 +1,75 @@
+import logging
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from inventory import jobs
+
+logger = logging.getLogger(__name__)
+
+
+def _run_in_thread(job):
+    try:
+        jobs.run_job(job)
+    finally:
+        # Cada hilo tiene su propia conexión; se cierra al terminar la tarea
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas en segundo plano pendientes usando un pool de hilos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Segundos de espera cuando no hay tareas pendientes')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Segundos sin avance tras los cuales una tarea en ejecución se reencola')
+        parser.add_argument('--once', action='store_true',
+                            help='Procesa las tareas pendientes y termina')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('--workers debe ser mayor a 0')
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        stale_after = timedelta(seconds=options['stale_after'])
+
+        self.stdout.write(f'Worker {worker_id} iniciado con {workers} hilos')
+        running = set()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            try:
+                while True:
+                    requeued, failed = jobs.requeue_stale(stale_after)
+                    if requeued:
+                        self.stdout.write(f'{requeued} tareas reencoladas por inactividad')
+                    if failed:
+                        self.stdout.write(f'{failed} tareas fallidas por inactividad sin intentos restantes')
+
+                    while len(running) < workers:
+                        job = jobs.claim_next(worker_id)
+                        if job is None:
+                            break
+                        self.stdout.write(f'Ejecutando {job}')
+                        running.add(pool.submit(_run_in_thread, job))
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+                    done, running = wait(running, timeout=options['poll_interval'],
+                                         return_when=FIRST_COMPLETED)
+                    for future in done:
+                        # run_job registra los errores de las tareas; esto es un fallo del propio worker
+                        if future.exception() is not None:
+                            logger.error(f"Worker thread failed: {future.exception()!r}",
+                                         exc_info=future.exception())
+            except KeyboardInterrupt:
+                self.stdout.write('Deteniendo; esperando las tareas en curso...')
+        self.stdout.write(self.style.SUCCESS('Worker detenido'))
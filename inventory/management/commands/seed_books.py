@@ -0,0 +1,125 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from inventory.models import Book
+
+# Los libros sinteticos usan el prefijo 979-9 para no chocar con ISBN reales;
+# las secuencias desde 90000000 (979-99) quedan reservadas para los benchmarks
+SEED_ISBN_PREFIX = '9799'
+SEED_SEQUENCE_LIMIT = 9 * 10 ** 7
+
+CATEGORIES = {
+    'Ficción': 22,
+    'Romance': 10,
+    'Misterio': 10,
+    'Ciencia Ficción': 9,
+    'Fantasía': 9,
+    'Literatura Clásica': 8,
+    'Infantil': 8,
+    'Historia': 7,
+    'Autoayuda': 6,
+    'Biografía': 5,
+    'Ciencia': 4,
+    'Poesía': 2,
+}
+
+SUPPLIER_COUNTRIES = {
+    'US': 30,
+    'ES': 18,
+    'MX': 12,
+    'GB': 10,
+    'AR': 8,
+    'CO': 7,
+    'VE': 5,
+    'CL': 4,
+    'FR': 3,
+    'DE': 3,
+}
+
+TITLE_WORDS = [
+    'Sombra', 'Viento', 'Ciudad', 'Mar', 'Noche', 'Jardín', 'Memoria', 'Fuego',
+    'Silencio', 'Camino', 'Río', 'Espejo', 'Invierno', 'Isla', 'Tiempo', 'Luz',
+    'Guerra', 'Casa', 'Sueño', 'Reino', 'Montaña', 'Carta', 'Secreto', 'Estrella',
+]
+
+FIRST_NAMES = [
+    'Gabriel', 'Isabel', 'Julio', 'Laura', 'Miguel', 'Ana', 'Jorge', 'Carmen',
+    'Mario', 'Elena', 'Pablo', 'Rosa', 'Carlos', 'Lucía', 'Rómulo', 'Teresa',
+]
+
+LAST_NAMES = [
+    'García', 'Allende', 'Cortázar', 'Borges', 'Vargas', 'Mastretta', 'Gallegos',
+    'Neruda', 'Fuentes', 'Rulfo', 'Poniatowska', 'Benedetti', 'Ocampo', 'Sábato',
+]
+
+
+def isbn13(sequence):
+    """Genera un ISBN-13 válido con dígito de control a partir de un número de secuencia."""
+    body = f'{SEED_ISBN_PREFIX}{sequence:08d}'
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+class Command(BaseCommand):
+    help = 'Genera un catálogo sintético de libros usando inserciones masivas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Semilla aleatoria para generar datos reproducibles')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        batch_size = options['batch_size']
+        if count < 1 or batch_size < 1:
+            raise CommandError('--count y --batch-size deben ser mayores a 0')
+
+        rng = random.Random(options['seed'])
+        # Se continúa tras el mayor ISBN sintético existente; contar filas
+        # repetiría secuencias si se borró alguno de los libros generados
+        last = (
+            Book.objects.filter(isbn__startswith=SEED_ISBN_PREFIX, isbn__lt=isbn13(SEED_SEQUENCE_LIMIT))
+            .order_by('-isbn').values_list('isbn', flat=True).first()
+        )
+        start = int(last[len(SEED_ISBN_PREFIX):-1]) + 1 if last else 0
+        if start + count > SEED_SEQUENCE_LIMIT:
+            raise CommandError('Se agotó el rango de ISBN sintéticos')
+
+        categories, category_weights = zip(*CATEGORIES.items())
+        countries, country_weights = zip(*SUPPLIER_COUNTRIES.items())
+
+        started = time.perf_counter()
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            batch_categories = rng.choices(categories, category_weights, k=size)
+            batch_countries = rng.choices(countries, country_weights, k=size)
+            books = []
+            for i in range(size):
+                sequence = start + created + i
+                books.append(Book(
+                    title=f'{rng.choice(TITLE_WORDS)} de {rng.choice(TITLE_WORDS).lower()} {sequence}',
+                    author=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                    isbn=isbn13(sequence),
+                    # Costos con distribución log-normal alrededor de ~15 USD
+                    cost_usd=Decimal(str(max(0.99, round(rng.lognormvariate(2.7, 0.5), 2)))),
+                    # La mayoría de los títulos tiene poco stock y unos pocos mucho
+                    stock_quantity=int(rng.expovariate(1 / 20)),
+                    category=batch_categories[i],
+                    supplier_country=batch_countries[i],
+                ))
+            with transaction.atomic():
+                Book.objects.bulk_create(books, batch_size=batch_size)
+            created += size
+            if created % 100000 < size or created == count:
+                self.stdout.write(f'{created}/{count} libros creados')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Se crearon {created} libros en {elapsed:.1f}s ({created / elapsed:.0f} libros/s)'
+        ))
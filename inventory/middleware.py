@@ -0,0 +1,204 @@
+import gzip
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'PATH_PREFIX': '/api/',
+    'MAX_IN_FLIGHT': 64,
+    'LATENCY_THRESHOLD_MS': 2000,
+    'COOLDOWN_SECONDS': 5,
+    'MIN_SAMPLES': 20,
+    'LATENCY_EXCLUDE': [],
+}
+
+
+class LoadSheddingMiddleware:
+    """Rechaza peticiones con 503 cuando el proceso está saturado.
+
+    Se descarta carga si hay más de ``MAX_IN_FLIGHT`` peticiones en curso o si
+    la latencia promedio (EWMA) supera ``LATENCY_THRESHOLD_MS``; en este último
+    caso se rechazan peticiones nuevas durante ``COOLDOWN_SECONDS`` para dar
+    tiempo a MySQL a recuperarse en lugar de encolar hasta el timeout.
+    Cada muestra se limita al doble del umbral y la latencia solo se evalúa
+    tras ``MIN_SAMPLES`` peticiones medidas, de modo que una petición lenta
+    aislada no dispara el descarte; las rutas que coinciden con
+    ``LATENCY_EXCLUDE`` (expresiones regulares; acciones lentas por diseño
+    como las masivas) no se miden. El estado es por proceso.
+    """
+
+    timer = time.monotonic
+    ewma_alpha = 0.2
+
+    def __init__(self, get_response):
+        config = {**DEFAULTS, **getattr(settings, 'LOAD_SHEDDING', {})}
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.path_prefix = config['PATH_PREFIX']
+        self.max_in_flight = config['MAX_IN_FLIGHT']
+        self.latency_threshold = config['LATENCY_THRESHOLD_MS'] / 1000
+        self.cooldown = config['COOLDOWN_SECONDS']
+        self.min_samples = config['MIN_SAMPLES']
+        self.latency_exclude = [re.compile(pattern) for pattern in config['LATENCY_EXCLUDE']]
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.latency_ewma = 0.0
+        self.samples = 0
+        self.shed_until = 0.0
+
+    def __call__(self, request):
+        if not request.path.startswith(self.path_prefix):
+            return self.get_response(request)
+
+        now = self.timer()
+        with self.lock:
+            if now < self.shed_until:
+                return self.overloaded(self.shed_until - now)
+            if self.in_flight >= self.max_in_flight:
+                return self.overloaded(1)
+            self.in_flight += 1
+
+        measured = not any(pattern.search(request.path) for pattern in self.latency_exclude)
+        try:
+            return self.get_response(request)
+        finally:
+            finished = self.timer()
+            with self.lock:
+                self.in_flight -= 1
+                if measured:
+                    self.record_latency(finished - now, finished)
+
+    def record_latency(self, elapsed, finished):
+        elapsed = min(elapsed, 2 * self.latency_threshold)
+        self.latency_ewma += self.ewma_alpha * (elapsed - self.latency_ewma)
+        self.samples += 1
+        if self.samples >= self.min_samples and self.latency_ewma > self.latency_threshold:
+            logger.warning(
+                f"Latencia promedio {self.latency_ewma * 1000:.0f}ms; "
+                f"descartando carga por {self.cooldown}s"
+            )
+            self.shed_until = finished + self.cooldown
+            self.latency_ewma = 0.0
+            self.samples = 0
+
+    def overloaded(self, retry_after):
+        response = JsonResponse(
+            {"error": "Servicio sobrecargado, intente más tarde"},
+            status=503
+        )
+        response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+
+COMPRESSION_DEFAULTS = {
+    'PATH_PREFIX': '/api/',
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 4,
+    'CACHE_ALIAS': 'default',
+    'CACHE_TIMEOUT': 300,
+}
+
+
+class CompressionMiddleware:
+    """Comprime respuestas con brotli o gzip según ``Accept-Encoding``.
+
+    Solo actúa bajo ``PATH_PREFIX``: las páginas HTML (admin, formularios con
+    token CSRF) no se comprimen aquí, para no exponerlas a BREACH; si se
+    quieren comprimir, use ``GZipMiddleware`` de Django, que agrega relleno.
+    Solo se comprimen cuerpos de al menos ``MIN_SIZE`` bytes. Las respuestas
+    GET cacheables se guardan ya comprimidas, indexadas por el hash del
+    cuerpo. Este cache solo evita volver a comprimir un cuerpo idéntico: la
+    vista, las consultas y el renderizado se ejecutan en cada petición, así
+    que nunca se sirven datos desactualizados.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = {**COMPRESSION_DEFAULTS, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+        self.path_prefix = config['PATH_PREFIX']
+        self.min_size = config['MIN_SIZE']
+        self.gzip_level = config['GZIP_LEVEL']
+        self.brotli_quality = config['BROTLI_QUALITY']
+        self.cache = caches[config['CACHE_ALIAS']]
+        self.cache_timeout = config['CACHE_TIMEOUT']
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not request.path.startswith(self.path_prefix):
+            return response
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < self.min_size):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.select_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if request.method == 'GET' and response.status_code == 200 and self.is_cacheable(response):
+            key = 'compressed:%s:%s' % (encoding, hashlib.blake2b(response.content, digest_size=16).hexdigest())
+            compressed = self.cache.get(key)
+            if compressed is None:
+                compressed = self.compress(response.content, encoding)
+                self.cache.set(key, compressed, self.cache_timeout)
+        else:
+            compressed = self.compress(response.content, encoding)
+
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def select_encoding(self, accept_encoding):
+        accepted = set()
+        for part in accept_encoding.split(','):
+            coding, *params = [item.strip() for item in part.split(';')]
+            quality = 1.0
+            for param in params:
+                name, _, value = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        quality = float(value.strip())
+                    except ValueError:
+                        quality = 0.0
+            if coding and quality > 0:
+                accepted.add(coding.lower())
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def is_cacheable(self, response):
+        cache_control = response.get('Cache-Control', '').lower()
+        return 'no-store' not in cache_control and 'private' not in cache_control
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        return gzip.compress(content, compresslevel=self.gzip_level, mtime=0)
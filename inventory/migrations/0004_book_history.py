@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_book_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookHistoryDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('field', models.PositiveSmallIntegerField(choices=[(1, 'selling_price_local'), (2, 'stock_quantity')])),
+                ('open', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('close', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('min', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('max', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('samples', models.PositiveIntegerField()),
+                ('book', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_history', to='inventory.book')),
+            ],
+            options={
+                'db_table': 'book_history_daily',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BookHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ts', models.DateTimeField(default=django.utils.timezone.now)),
+                ('field', models.PositiveSmallIntegerField(choices=[(1, 'selling_price_local'), (2, 'stock_quantity')])),
+                ('value', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('exchange_rate', models.DecimalField(blank=True, decimal_places=6, max_digits=14, null=True)),
+                ('book', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='history', to='inventory.book')),
+            ],
+            options={
+                'db_table': 'book_history',
+                'ordering': ['ts'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookhistorydaily',
+            constraint=models.UniqueConstraint(fields=('book', 'day', 'field'), name='book_history_daily_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='bookhistory',
+            index=models.Index(fields=['book', 'ts'], name='book_history_book_ts_idx'),
+        ),
+    ]
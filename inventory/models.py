@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 import re
 
 class Book(models.Model):
@@ -46,4 +47,93 @@ class Book(models.Model):
 
     class Meta:
         db_table = 'books'
-        ordering = ['id'] 
\ No newline at end of file
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['category'], name='books_category_idx'),
+            models.Index(fields=['supplier_country'], name='books_supplier_country_idx'),
+        ]
+
+class Job(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En ejecución'),
+        (STATUS_SUCCEEDED, 'Completado'),
+        (STATUS_FAILED, 'Fallido'),
+        (STATUS_CANCELLED, 'Cancelado'),
+    ]
+    FINISHED_STATUSES = [STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED]
+
+    kind = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    payload = models.JSONField(default=dict, blank=True)
+    checkpoint = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    error = models.TextField(blank=True)
+    cancel_requested = models.BooleanField(default=False)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='jobs_status_run_after_idx'),
+        ]
+
+
+class BookHistory(models.Model):
+    """Historial append-only de precio y stock; una fila compacta por cambio."""
+    FIELD_PRICE = 1
+    FIELD_STOCK = 2
+    FIELD_CHOICES = [
+        (FIELD_PRICE, 'selling_price_local'),
+        (FIELD_STOCK, 'stock_quantity'),
+    ]
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='history', db_index=False)
+    ts = models.DateTimeField(default=timezone.now)
+    field = models.PositiveSmallIntegerField(choices=FIELD_CHOICES)
+    value = models.DecimalField(max_digits=12, decimal_places=2)
+    exchange_rate = models.DecimalField(max_digits=14, decimal_places=6, null=True, blank=True)
+
+    class Meta:
+        db_table = 'book_history'
+        ordering = ['ts']
+        indexes = [
+            models.Index(fields=['book', 'ts'], name='book_history_book_ts_idx'),
+        ]
+
+
+class BookHistoryDaily(models.Model):
+    """Agregado diario del historial, generado por compact_book_history."""
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='daily_history', db_index=False)
+    day = models.DateField()
+    field = models.PositiveSmallIntegerField(choices=BookHistory.FIELD_CHOICES)
+    open = models.DecimalField(max_digits=12, decimal_places=2)
+    close = models.DecimalField(max_digits=12, decimal_places=2)
+    min = models.DecimalField(max_digits=12, decimal_places=2)
+    max = models.DecimalField(max_digits=12, decimal_places=2)
+    samples = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'book_history_daily'
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'day', 'field'], name='book_history_daily_unique'),
+        ]
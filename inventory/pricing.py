@@ -0,0 +1,44 @@
+import logging
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_RATE_URL = 'https://api.exchangerate-api.com/v4/latest/USD'
+DEFAULT_EXCHANGE_RATE = 0.85
+MARGIN_PERCENTAGE = 40
+CURRENCY = 'VES'
+
+
+def calculate_selling_price(cost_usd, exchange_rate):
+    """Devuelve (costo local, precio de venta local) aplicando el margen."""
+    cost_local = float(cost_usd) * exchange_rate
+    return cost_local, cost_local * (1 + MARGIN_PERCENTAGE / 100)
+
+
+class ExchangeRateUnavailable(Exception):
+    pass
+
+
+def fetch_exchange_rate():
+    """Consulta la tasa USD→CURRENCY; lanza ExchangeRateUnavailable si la API falla.
+
+    Es la variante para los recálculos masivos, que no deben aplicar la tasa
+    por defecto a todo el catálogo.
+    """
+    try:
+        response = requests.get(EXCHANGE_RATE_URL, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        return data['rates'][CURRENCY]
+    except (requests.RequestException, KeyError, ValueError) as e:
+        raise ExchangeRateUnavailable(f"No se pudo obtener la tasa de cambio: {e}") from e
+
+
+def get_exchange_rate():
+    """Como fetch_exchange_rate, pero usa DEFAULT_EXCHANGE_RATE si la API falla."""
+    try:
+        return fetch_exchange_rate()
+    except ExchangeRateUnavailable as e:
+        logger.warning(f"Error fetching exchange rate: {e.__cause__}. Using default rate {DEFAULT_EXCHANGE_RATE}")
+        return DEFAULT_EXCHANGE_RATE
@@ -0,0 +1,64 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Dependencias opcionales: sin ellas se usa el codificador JSON estándar
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    """Tipos que orjson/msgpack no serializan por sí mismos (Decimal, lazy strings, etc.)."""
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer que codifica con orjson cuando está instalado.
+
+    Se configura orjson para producir la misma salida compacta que el
+    renderer estándar: claves no string convertidas a texto, fechas UTC con
+    ``Z`` y U+2028/U+2029 escapados. Si el cliente pide ``indent``, orjson no
+    está disponible o no puede codificar algún valor, se delega en el
+    renderer estándar.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+def book_renderer_classes():
+    """Renderers disponibles para BookViewSet, en orden de preferencia."""
+    classes = [FastJSONRenderer]
+    if msgpack is not None:
+        classes.append(MessagePackRenderer)
+    return classes
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Book
+from rest_framework.validators import UniqueValidator
+from .models import Book, BookHistory, Job
 import re
 
 class BookSerializer(serializers.ModelSerializer):
@@ -11,6 +12,15 @@ class BookSerializer(serializers.ModelSerializer):
             'supplier_country', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        # Una sola consulta de unicidad al validar; create/update no repiten la verificación
+        extra_kwargs = {
+            'isbn': {
+                'validators': [UniqueValidator(
+                    queryset=Book.objects.all(),
+                    message="Ya existe un libro con este ISBN"
+                )]
+            }
+        }
 
     def validate_cost_usd(self, value):
         if value <= 0:
@@ -38,16 +48,146 @@ class BookSerializer(serializers.ModelSerializer):
         
         return value
 
-    def create(self, validated_data):
-        isbn = validated_data.get('isbn')
-        if Book.objects.filter(isbn=isbn).exists():
-            raise serializers.ValidationError({"isbn": "Ya existe un libro con este ISBN"})
-        
-        return super().create(validated_data)
 
-    def update(self, instance, validated_data):
-        isbn = validated_data.get('isbn', instance.isbn)
-        if Book.objects.filter(isbn=isbn).exclude(id=instance.id).exists():
-            raise serializers.ValidationError({"isbn": "Ya existe un libro con este ISBN"})
-        
-        return super().update(instance, validated_data)
\ No newline at end of file
+class JobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'payload', 'progress', 'result', 'error',
+            'attempts', 'max_attempts', 'cancel_requested', 'run_after',
+            'started_at', 'finished_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'result', 'error', 'attempts', 'cancel_requested',
+            'run_after', 'started_at', 'finished_at', 'created_at', 'updated_at'
+        ]
+
+    def get_progress(self, obj):
+        percent = None
+        if obj.total:
+            percent = round(min(obj.processed / obj.total, 1) * 100, 1)
+        elif obj.status == Job.STATUS_SUCCEEDED:
+            percent = 100.0
+        return {"processed": obj.processed, "total": obj.total, "percent": percent}
+
+    def validate_kind(self, value):
+        from .jobs import HANDLERS
+        if value not in HANDLERS:
+            raise serializers.ValidationError(
+                f"Tipo de tarea desconocido. Opciones: {', '.join(sorted(HANDLERS))}"
+            )
+        return value
+
+    def validate_max_attempts(self, value):
+        from .jobs import MAX_ATTEMPTS_LIMIT
+        if value < 1:
+            raise serializers.ValidationError("Debe permitir al menos un intento")
+        if value > MAX_ATTEMPTS_LIMIT:
+            raise serializers.ValidationError(f"Se permiten como máximo {MAX_ATTEMPTS_LIMIT} intentos")
+        return value
+
+    def validate(self, attrs):
+        from .jobs import clean_payload
+        try:
+            attrs['payload'] = clean_payload(attrs['kind'], attrs.get('payload') or {})
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError({'payload': e.detail})
+        return attrs
+
+
+class RepricePayloadSerializer(serializers.Serializer):
+    category = serializers.CharField(required=False, max_length=100)
+    supplier_country = serializers.CharField(required=False, max_length=2)
+    chunk_size = serializers.IntegerField(default=1000, min_value=1, max_value=10000)
+
+    def validate(self, attrs):
+        unknown = set(self.initial_data) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+        return attrs
+
+
+class BookBulkFilterSerializer(serializers.Serializer):
+    """Mismos filtros que el listado de libros, más una lista explícita de ids."""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False,
+                                allow_empty=False, max_length=10000)
+    category = serializers.CharField(required=False, max_length=100)
+    supplier_country = serializers.CharField(required=False, max_length=2)
+    threshold = serializers.IntegerField(required=False, min_value=0)
+
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        # Anidado no tiene initial_data; un filtro mal escrito no debe ampliar la selección
+        unknown = set(data) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(f"Filtros desconocidos: {', '.join(sorted(unknown))}")
+        return attrs
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Debe indicar al menos un filtro")
+        return attrs
+
+    def filter_queryset(self, queryset, filters):
+        if 'ids' in filters:
+            queryset = queryset.filter(pk__in=filters['ids'])
+        if 'category' in filters:
+            queryset = queryset.filter(category=filters['category'])
+        if 'supplier_country' in filters:
+            queryset = queryset.filter(supplier_country=filters['supplier_country'])
+        if 'threshold' in filters:
+            queryset = queryset.filter(stock_quantity__lt=filters['threshold'])
+        return queryset
+
+
+class BookBulkDeleteSerializer(serializers.Serializer):
+    filters = BookBulkFilterSerializer()
+    dry_run = serializers.BooleanField(default=False)
+    chunk_size = serializers.IntegerField(default=500, min_value=1, max_value=5000)
+
+    def validate(self, attrs):
+        unknown = set(self.initial_data) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+        return attrs
+
+
+class BookBulkUpdateSerializer(BookBulkDeleteSerializer):
+    patch = serializers.DictField()
+
+    def validate_patch(self, value):
+        if not value:
+            raise serializers.ValidationError("Debe indicar al menos un campo a modificar")
+        if 'isbn' in value:
+            raise serializers.ValidationError("El ISBN no se puede modificar en lote")
+        book_serializer = BookSerializer(data=value, partial=True)
+        book_serializer.is_valid(raise_exception=True)
+        unknown = set(value) - set(book_serializer.validated_data)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Campos no modificables: {', '.join(sorted(unknown))}"
+            )
+        return book_serializer.validated_data
+
+
+class BookHistoryQuerySerializer(serializers.Serializer):
+    FIELDS = {'price': BookHistory.FIELD_PRICE, 'stock': BookHistory.FIELD_STOCK}
+
+    # 'from' es palabra reservada: se declara en __init__
+    to = serializers.DateTimeField(required=False)
+    field = serializers.ChoiceField(choices=list(FIELDS), required=False)
+    limit = serializers.IntegerField(default=1000, min_value=1, max_value=10000)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['from'] = serializers.DateTimeField(required=False)
+
+    def validate_field(self, value):
+        return self.FIELDS[value]
+
+    def validate(self, attrs):
+        if 'from' in attrs and 'to' in attrs and attrs['from'] >= attrs['to']:
+            raise serializers.ValidationError("'from' debe ser anterior a 'to'")
+        return attrs
@@ -0,0 +1,96 @@
+import re
+from contextlib import ExitStack, contextmanager
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.test.utils import CaptureQueriesContext
+
+
+def _normalize(sql):
+    """Reemplaza literales para agrupar consultas con la misma forma (detecta N+1)."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+    return re.sub(r'\(\?(, \?)*\)', '(...)', sql)
+
+
+def format_query_diff(queries, max_queries):
+    """Lista las consultas ejecutadas en formato diff contra el presupuesto.
+
+    Las consultas dentro del presupuesto se marcan con ' ' y las que lo
+    exceden con '+'. Las consultas repetidas con la misma forma se anotan
+    para que los N+1 sean evidentes.
+    """
+    shapes = {}
+    for query in queries:
+        shape = _normalize(query['sql'])
+        shapes[shape] = shapes.get(shape, 0) + 1
+
+    lines = [f'--- presupuesto ({max_queries} consultas)', f'+++ ejecutado ({len(queries)} consultas)']
+    for i, query in enumerate(queries, start=1):
+        marker = '+' if i > max_queries else ' '
+        repeated = shapes[_normalize(query['sql'])]
+        note = f'  [repetida x{repeated}]' if repeated > 1 else ''
+        lines.append(f"{marker} {i}. {query['sql']}{note}")
+    return '\n'.join(lines)
+
+
+class QueryBudget:
+    """Resultado de una medición: consultas ejecutadas y filas leídas de los cursores."""
+
+    FETCH_METHODS = ('fetchone', 'fetchmany', 'fetchall')
+
+    def __init__(self):
+        self.queries = []
+        self.rows = 0
+
+    def counting_fetch(self, method):
+        """Versión de CursorWrapper.<method> que cuenta las filas devueltas por la base de datos."""
+        budget = self
+
+        def fetch(wrapper, *args, **kwargs):
+            result = getattr(wrapper.cursor, method)(*args, **kwargs)
+            if method == 'fetchone':
+                budget.rows += result is not None
+            else:
+                budget.rows += len(result)
+            return result
+        return fetch
+
+
+class QueryBudgetMixin:
+    """Mixin para TestCase que fija el máximo de consultas SQL y filas por bloque.
+
+    Uso::
+
+        with self.assertQueryBudget(max_queries=2, max_rows=5):
+            self.client.get(url)
+
+    ``max_rows`` cuenta las filas que devuelven los cursores, así que incluye
+    las de ``values()``/``values_list()``, ``iterator()`` y los ``COUNT(*)``
+    (una fila cada uno), no solo las instancias de modelos.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, max_rows=None, using=connection):
+        budget = QueryBudget()
+        with ExitStack() as stack:
+            # CursorWrapper delega fetch* con __getattr__; se definen en la clase para contarlos
+            for method in QueryBudget.FETCH_METHODS:
+                stack.enter_context(
+                    patch.object(CursorWrapper, method, budget.counting_fetch(method), create=True)
+                )
+            captured = stack.enter_context(CaptureQueriesContext(using))
+            yield budget
+        budget.queries = captured.captured_queries
+
+        if len(budget.queries) > max_queries:
+            self.fail(
+                f'Se ejecutaron {len(budget.queries)} consultas, el presupuesto es {max_queries}\n'
+                + format_query_diff(budget.queries, max_queries)
+            )
+        if max_rows is not None and budget.rows > max_rows:
+            self.fail(
+                f'Se cargaron {budget.rows} filas, el presupuesto es {max_rows}\n'
+                + format_query_diff(budget.queries, max_queries)
+            )
@@ -1,14 +1,34 @@
+import gzip
 import json
+from io import StringIO
+from datetime import timedelta
 from decimal import Decimal
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase, APIClient
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from unittest.mock import patch, Mock
+import brotli
+import msgpack
 import requests
-from .models import Book
+from django.utils import timezone
+from . import jobs
+from .models import Book, BookHistory, BookHistoryDaily, Job
 from .serializers import BookSerializer
+from .benchmarks import SCENARIOS, run_benchmarks
+from .management.commands.seed_books import isbn13
+from .testing import QueryBudgetMixin
+from .middleware import LoadSheddingMiddleware
+from .throttling import ActionRateThrottle, ClientRateThrottle
+from .renderers import FastJSONRenderer
+from .views import BookViewSet
 
 class BookModelTest(TestCase):
     """Pruebas para el modelo Book"""
@@ -253,7 +273,7 @@ class BookAPITest(APITestCase):
         self.assertEqual(response.data['count'], 1)
         self.assertEqual(response.data['results'][0]['author'], 'Miguel de Cervantes')
     
-    @patch('inventory.views.requests.get')
+    @patch('inventory.pricing.requests.get')
     def test_calculate_price_success(self, mock_get):
         """Prueba: Calcular precio exitosamente"""
         mock_response = Mock()
@@ -274,7 +294,7 @@ class BookAPITest(APITestCase):
         self.book.refresh_from_db()
         self.assertEqual(float(self.book.selling_price_local), 19.03)
     
-    @patch('inventory.views.requests.get')
+    @patch('inventory.pricing.requests.get')
     def test_calculate_price_api_fallback(self, mock_get):
         """Prueba: Calcular precio con fallback cuando la API externa falla"""
         mock_get.side_effect = requests.RequestException('API no disponible')
@@ -319,4 +339,877 @@ class PaginationTest(APITestCase):
         response = self.client.get(reverse('book-list'), {'page': 2})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 5)  
-        self.assertIsNotNone(response.data['previous'])
\ No newline at end of file
+        self.assertIsNotNone(response.data['previous'])
+
+class BenchmarkToolsTest(TestCase):
+    """Pruebas para el generador de datos y la suite de benchmarks"""
+
+    def test_seed_books_command(self):
+        """Prueba: seed_books crea libros válidos en lotes"""
+        call_command('seed_books', count=30, batch_size=7, seed=1, stdout=StringIO())
+        self.assertEqual(Book.objects.count(), 30)
+        for book in Book.objects.all()[:5]:
+            book.full_clean()
+
+        call_command('seed_books', count=5, seed=1, stdout=StringIO())
+        self.assertEqual(Book.objects.count(), 35)
+
+    def test_seed_books_after_deleting_seeded_rows(self):
+        """Prueba: seed_books continúa tras el mayor ISBN aunque se hayan borrado libros"""
+        call_command('seed_books', count=10, seed=1, stdout=StringIO())
+        Book.objects.order_by('isbn').first().delete()
+
+        call_command('seed_books', count=5, seed=1, stdout=StringIO())
+        self.assertEqual(Book.objects.count(), 14)
+        self.assertEqual(Book.objects.order_by('-isbn').first().isbn, isbn13(14))
+
+    def test_run_benchmarks_report(self):
+        """Prueba: el reporte incluye percentiles y consultas por petición"""
+        call_command('seed_books', count=20, seed=1, stdout=StringIO())
+        report = run_benchmarks(iterations=3, warmup=0)
+
+        self.assertEqual(set(report['scenarios']), set(SCENARIOS))
+        for name, result in report['scenarios'].items():
+            self.assertEqual(result['requests'], 3)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries_per_request'], 0)
+            self.assertTrue(all(code.startswith('2') for code in result['status_codes']), name)
+        self.assertEqual(report['meta']['book_count'], 20)
+        self.assertEqual(Book.objects.count(), 20)
+
+    def test_encodings_benchmark_runs_alone(self):
+        """Prueba: --encodings sin --scenario no ejecuta los escenarios de endpoints"""
+        out = StringIO()
+        with patch('inventory.management.commands.run_benchmarks.run_benchmarks') as mock_run:
+            call_command('run_benchmarks', encodings=True, iterations=1, stdout=out)
+        mock_run.assert_not_called()
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report), {'encodings'})
+
+    def test_run_benchmarks_keeps_existing_books(self):
+        """Prueba: la limpieza del benchmark solo borra los libros de la corrida"""
+        defaults = {
+            'title': 'Libro', 'author': 'Autor', 'cost_usd': Decimal('10.00'),
+            'stock_quantity': 1, 'category': 'Ficción', 'supplier_country': 'US',
+        }
+        Book.objects.create(isbn='9798000000017', **defaults)
+        Book.objects.create(isbn='9799900000001', **defaults)
+
+        run_benchmarks(scenarios=['create', 'detail'], iterations=3, warmup=0)
+
+        self.assertEqual(
+            set(Book.objects.values_list('isbn', flat=True)), {'9798000000017', '9799900000001'}
+        )
+
+
+class QueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Presupuesto de consultas SQL y filas cargadas por endpoint"""
+
+    def setUp(self):
+        for i in range(30):
+            Book.objects.create(
+                title=f'Libro {i}',
+                author=f'Autor {i}',
+                isbn=f'978-84-376-{i:04d}-{i % 10}',
+                cost_usd=Decimal('10.00') + i,
+                stock_quantity=i,
+                category='Ficción' if i % 2 else 'Historia',
+                supplier_country='ES'
+            )
+        self.book = Book.objects.first()
+        self.list_url = reverse('book-list')
+        self.detail_url = reverse('book-detail', kwargs={'pk': self.book.pk})
+
+    def test_list_budget(self):
+        """Prueba: listar cuesta un COUNT y un SELECT limitado a la página"""
+        for params in ({}, {'page': 3}, {'search': 'Autor 1'},
+                       {'category': 'Ficción', 'supplier_country': 'ES'}, {'threshold': 10}):
+            with self.subTest(params=params):
+                # La página de 5 libros más la fila del COUNT
+                with self.assertQueryBudget(max_queries=2, max_rows=6):
+                    response = self.client.get(self.list_url, params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_budget(self):
+        """Prueba: el detalle cuesta una sola consulta"""
+        with self.assertQueryBudget(max_queries=1, max_rows=1):
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_create_budget(self):
+        """Prueba: crear valida el ISBN una sola vez, inserta y registra el stock inicial"""
+        data = {
+            'title': '1984',
+            'author': 'George Orwell',
+            'isbn': '978-84-9759-327-1',
+            'cost_usd': '12.99',
+            'stock_quantity': 10,
+            'category': 'Ciencia Ficción',
+            'supplier_country': 'US'
+        }
+        with self.assertQueryBudget(max_queries=3):
+            response = self.client.post(self.list_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_update_budget(self):
+        """Prueba: actualizar carga el libro, valida el ISBN, guarda y registra el stock"""
+        # El libro y, en SQLite, el id que devuelve el INSERT del historial
+        with self.assertQueryBudget(max_queries=4, max_rows=2):
+            response = self.client.patch(
+                self.detail_url, {'isbn': self.book.isbn, 'stock_quantity': 3}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @patch('inventory.pricing.requests.get')
+    def test_calculate_price_budget(self, mock_get):
+        """Prueba: calcular precio carga el libro, lo guarda y registra el precio"""
+        mock_get.return_value = Mock(json=Mock(return_value={'rates': {'VES': 0.85}}))
+        url = reverse('book-calculate-price', kwargs={'pk': self.book.pk})
+        with self.assertQueryBudget(max_queries=3, max_rows=2):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_row_budget_counts_values_rows(self):
+        """Prueba: el presupuesto de filas también cuenta values_list e iterator"""
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(max_queries=1, max_rows=3):
+                list(Book.objects.values_list('id', flat=True)[:5])
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(max_queries=1, max_rows=3):
+                list(Book.objects.values('id').iterator(chunk_size=2))
+
+    def test_budget_failure_shows_sql_diff(self):
+        """Prueba: al exceder el presupuesto se muestra el SQL ejecutado"""
+        with self.assertRaises(AssertionError) as ctx:
+            with self.assertQueryBudget(max_queries=1):
+                for book in Book.objects.all()[:3]:
+                    Book.objects.get(pk=book.pk)
+        message = str(ctx.exception)
+        self.assertIn('Se ejecutaron 4 consultas, el presupuesto es 1', message)
+        self.assertIn('+ 4. SELECT', message)
+        self.assertIn('[repetida x3]', message)
+
+
+class ThrottlingTest(APITestCase):
+    """Pruebas para el throttling por cliente y por acción"""
+
+    def setUp(self):
+        caches['throttle'].clear()
+        throttles = patch.object(BookViewSet, 'throttle_classes', [ClientRateThrottle, ActionRateThrottle])
+        throttles.start()
+        self.addCleanup(throttles.stop)
+        self.book = Book.objects.create(
+            title='El Quijote',
+            author='Miguel de Cervantes',
+            isbn='978-84-376-0494-7',
+            cost_usd=Decimal('15.99'),
+            stock_quantity=25,
+            category='Literatura Clásica',
+            supplier_country='ES'
+        )
+        self.calculate_price_url = reverse('book-calculate-price', kwargs={'pk': self.book.pk})
+
+    def tearDown(self):
+        caches['throttle'].clear()
+
+    @patch('inventory.pricing.requests.get')
+    @patch.object(ActionRateThrottle, 'THROTTLE_RATES', {'calculate-price': '2/min'})
+    def test_expensive_action_has_own_budget(self, mock_get):
+        """Prueba: calculate-price se limita sin afectar al resto de la API"""
+        mock_get.return_value = Mock(json=Mock(return_value={'rates': {'VES': 0.85}}))
+        for _ in range(2):
+            response = self.client.post(self.calculate_price_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(self.calculate_price_url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        response = self.client.get(reverse('book-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @patch.object(ClientRateThrottle, 'THROTTLE_RATES', {'client': '3/min'})
+    def test_token_bucket_refills(self):
+        """Prueba: la cubeta se rellena con el tiempo"""
+        now = [1000.0]
+        with patch.object(ClientRateThrottle, 'timer', lambda self: now[0]):
+            for _ in range(3):
+                self.assertEqual(self.client.get(reverse('book-list')).status_code, status.HTTP_200_OK)
+            response = self.client.get(reverse('book-list'))
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response['Retry-After'], '20')
+
+            now[0] += 20
+            self.assertEqual(self.client.get(reverse('book-list')).status_code, status.HTTP_200_OK)
+
+
+class LoadSheddingTest(APITestCase):
+    """Pruebas para el descarte de carga"""
+
+    @override_settings(LOAD_SHEDDING={'MAX_IN_FLIGHT': 0})
+    def test_rejects_when_in_flight_limit_reached(self):
+        """Prueba: responde 503 con Retry-After si hay demasiadas peticiones en curso"""
+        response = self.client.get(reverse('book-list'))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+    @override_settings(LOAD_SHEDDING={
+        'LATENCY_THRESHOLD_MS': 100, 'COOLDOWN_SECONDS': 5, 'MIN_SAMPLES': 3
+    })
+    def test_sheds_after_high_latency(self):
+        """Prueba: tras una latencia alta sostenida se descarta carga durante el enfriamiento"""
+        now = [0.0]
+
+        def slow_view(request):
+            now[0] += 1
+            return HttpResponse('ok')
+
+        middleware = LoadSheddingMiddleware(slow_view)
+        middleware.timer = lambda: now[0]
+        request = RequestFactory().get('/api/books/')
+
+        # Muestras limitadas a 200ms: el promedio supera el umbral en la cuarta petición
+        for _ in range(4):
+            self.assertEqual(middleware(request).status_code, 200)
+        response = middleware(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+
+        now[0] += 5
+        self.assertEqual(middleware(request).status_code, 200)
+        self.assertEqual(middleware(RequestFactory().get('/admin/')).status_code, 200)
+
+    @override_settings(LOAD_SHEDDING={
+        'LATENCY_THRESHOLD_MS': 100, 'MIN_SAMPLES': 3, 'LATENCY_EXCLUDE': [r'^/api/books/bulk-']
+    })
+    def test_isolated_or_excluded_slow_requests_do_not_shed(self):
+        """Prueba: una petición lenta aislada o una acción excluida no disparan el descarte"""
+        now = [0.0]
+
+        def view(request):
+            now[0] += 60 if 'slow' in request.GET or 'bulk' in request.path else 0.01
+            return HttpResponse('ok')
+
+        middleware = LoadSheddingMiddleware(view)
+        middleware.timer = lambda: now[0]
+        factory = RequestFactory()
+
+        for _ in range(5):
+            self.assertEqual(middleware(factory.post('/api/books/bulk-update/')).status_code, 200)
+            self.assertEqual(middleware(factory.get('/api/books/')).status_code, 200)
+        self.assertEqual(middleware(factory.get('/api/books/', {'slow': 1})).status_code, 200)
+        for _ in range(20):
+            self.assertEqual(middleware(factory.get('/api/books/')).status_code, 200)
+
+
+class JobQueueTest(APITestCase):
+    """Pruebas para la cola de tareas en segundo plano"""
+
+    def setUp(self):
+        for i in range(7):
+            Book.objects.create(
+                title=f'Libro {i}',
+                author=f'Autor {i}',
+                isbn=f'978-84-376-{i:04d}-{i}',
+                cost_usd=Decimal('10.00'),
+                stock_quantity=i,
+                category='Ficción' if i % 2 else 'Historia',
+                supplier_country='ES'
+            )
+        self.jobs_url = reverse('job-list')
+
+    @patch('inventory.pricing.requests.get')
+    def test_reprice_job_via_api(self, mock_get):
+        """Prueba: crear una tarea, ejecutarla y consultar su estado"""
+        mock_get.return_value = Mock(json=Mock(return_value={'rates': {'VES': 2.0}}))
+        response = self.client.post(
+            self.jobs_url, {'kind': 'reprice', 'payload': {'chunk_size': 3}}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Job.STATUS_PENDING)
+
+        jobs.run_job(jobs.claim_next('test'))
+
+        response = self.client.get(reverse('job-detail', kwargs={'pk': response.data['id']}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], Job.STATUS_SUCCEEDED)
+        self.assertEqual(response.data['progress'], {'processed': 7, 'total': 7, 'percent': 100.0})
+        self.assertEqual(response.data['result'], {'updated': 7, 'exchange_rate': 2.0})
+        self.assertEqual(Book.objects.filter(selling_price_local=Decimal('28.00')).count(), 7)
+
+    @patch('inventory.pricing.requests.get')
+    def test_reprice_job_retries_without_exchange_rate(self, mock_get):
+        """Prueba: si la API de tasas falla, la tarea se reintenta sin tocar los precios"""
+        mock_get.side_effect = requests.RequestException('API no disponible')
+        job = jobs.enqueue('reprice')
+        jobs.run_job(jobs.claim_next('test'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        self.assertIn('tasa de cambio', job.error)
+        self.assertEqual(job.checkpoint, {})
+        self.assertFalse(Book.objects.filter(selling_price_local__isnull=False).exists())
+
+    def test_unknown_kind_rejected(self):
+        """Prueba: no se aceptan tipos de tarea no registrados"""
+        response = self.client.post(self.jobs_url, {'kind': 'borrar-todo'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('kind', response.data)
+
+    def test_invalid_payload_rejected(self):
+        """Prueba: el payload se valida según el tipo de tarea al encolarla"""
+        for payload in ({'chunk_size': -1}, {'chunk_size': 'abc'}, {'categoria': 'Ficción'}):
+            with self.subTest(payload=payload):
+                response = self.client.post(
+                    self.jobs_url, {'kind': 'reprice', 'payload': payload}, format='json'
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('payload', response.data)
+                with self.assertRaises(ValueError):
+                    jobs.enqueue('reprice', payload)
+        self.assertFalse(Job.objects.exists())
+
+    def test_retry_backoff_is_capped(self):
+        """Prueba: la espera entre reintentos tiene tope y max_attempts está acotado"""
+        def failing(ctx):
+            raise RuntimeError('falla')
+
+        with patch.dict(jobs.HANDLERS, {'failing': failing}):
+            job = jobs.enqueue('failing')
+            Job.objects.filter(pk=job.pk).update(attempts=39, max_attempts=50)
+            jobs.run_job(jobs.claim_next('test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        self.assertLessEqual(
+            job.run_after, timezone.now() + timedelta(seconds=jobs.RETRY_MAX_SECONDS)
+        )
+
+        response = self.client.post(
+            self.jobs_url, {'kind': 'reprice', 'max_attempts': 1000}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('max_attempts', response.data)
+        with self.assertRaises(ValueError):
+            jobs.enqueue('reprice', max_attempts=1000)
+
+    def test_retry_resumes_from_checkpoint(self):
+        """Prueba: una tarea fallida se reintenta desde su último checkpoint"""
+        calls = []
+
+        def flaky(ctx):
+            start = ctx.state.get('next', 0)
+            calls.append(start)
+            for i in range(start, 4):
+                if i == 2 and len(calls) == 1:
+                    raise RuntimeError('conexión perdida')
+                ctx.save_checkpoint({'next': i + 1}, processed=i + 1, total=4)
+            return {'done': True}
+
+        with patch.dict(jobs.HANDLERS, {'flaky': flaky}):
+            job = jobs.enqueue('flaky', max_attempts=2)
+            jobs.run_job(jobs.claim_next('test'))
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.STATUS_PENDING)
+            self.assertIn('conexión perdida', job.error)
+            self.assertIsNone(jobs.claim_next('test'))
+
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            jobs.run_job(jobs.claim_next('test'))
+            job.refresh_from_db()
+
+        self.assertEqual(calls, [0, 2])
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.processed, 4)
+
+    def test_cancel_jobs(self):
+        """Prueba: cancelar tareas pendientes y en ejecución"""
+        pending = jobs.enqueue('reprice')
+        response = self.client.post(reverse('job-cancel', kwargs={'pk': pending.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], Job.STATUS_CANCELLED)
+
+        response = self.client.post(reverse('job-cancel', kwargs={'pk': pending.pk}))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        def long_running(ctx):
+            jobs.cancel(ctx.job)
+            ctx.save_checkpoint({'step': 1})
+            return {'done': True}
+
+        with patch.dict(jobs.HANDLERS, {'long': long_running}):
+            job = jobs.enqueue('long')
+            jobs.run_job(jobs.claim_next('test'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_CANCELLED)
+        self.assertEqual(job.checkpoint, {'step': 1})
+
+    def test_requeue_stale_jobs(self):
+        """Prueba: las tareas inactivas se reencolan o fallan si agotaron sus intentos"""
+        old = timezone.now() - timedelta(hours=1)
+        retry = jobs.enqueue('reprice', max_attempts=2)
+        exhausted = jobs.enqueue('reprice', max_attempts=2)
+        Job.objects.filter(pk=retry.pk).update(
+            status=Job.STATUS_RUNNING, locked_by='muerto', attempts=1, updated_at=old
+        )
+        Job.objects.filter(pk=exhausted.pk).update(
+            status=Job.STATUS_RUNNING, locked_by='muerto', attempts=2, updated_at=old
+        )
+
+        self.assertEqual(jobs.requeue_stale(timedelta(minutes=10)), (1, 1))
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retry.status, retry.locked_by), (Job.STATUS_PENDING, ''))
+        self.assertEqual(exhausted.status, Job.STATUS_FAILED)
+        self.assertIsNotNone(exhausted.finished_at)
+
+    def test_worker_stops_after_losing_lock(self):
+        """Prueba: un worker cuya tarea fue reencolada y tomada por otro no la sobrescribe"""
+        def slow(ctx):
+            jobs.requeue_stale(timedelta(0))
+            jobs.claim_next('otro')
+            ctx.save_checkpoint({'step': 1})
+            return {'done': True}
+
+        with patch.dict(jobs.HANDLERS, {'slow': slow}):
+            job = jobs.enqueue('slow')
+            jobs.run_job(jobs.claim_next('lento'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_RUNNING)
+        self.assertEqual(job.locked_by, 'otro')
+        self.assertEqual(job.checkpoint, {})
+        self.assertIsNone(job.result)
+
+
+class JobWorkerCommandTest(TransactionTestCase):
+    """Pruebas para el comando run_jobs (los hilos necesitan ver datos confirmados)"""
+
+    @patch('inventory.pricing.requests.get')
+    def test_run_jobs_command(self, mock_get):
+        """Prueba: el worker procesa las tareas pendientes y termina con --once"""
+        mock_get.return_value = Mock(json=Mock(return_value={'rates': {'VES': 2.0}}))
+        for i in range(4):
+            Book.objects.create(
+                title=f'Libro {i}',
+                author=f'Autor {i}',
+                isbn=f'978-84-376-{i:04d}-{i}',
+                cost_usd=Decimal('10.00'),
+                stock_quantity=i,
+                category='Historia',
+                supplier_country='ES'
+            )
+        job = jobs.enqueue('reprice', {'category': 'Historia'})
+        call_command('run_jobs', workers=1, once=True, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.result['updated'], 4)
+
+    def test_worker_thread_errors_are_logged(self):
+        """Prueba: un error fuera de run_job en un hilo del worker queda en el log"""
+        jobs.enqueue('reprice')
+        with patch.object(jobs, 'run_job', side_effect=OverflowError('date value out of range')), \
+                self.assertLogs('inventory.management.commands.run_jobs', 'ERROR') as logs:
+            call_command('run_jobs', workers=1, once=True, stdout=StringIO())
+        self.assertIn('date value out of range', logs.output[0])
+
+
+class BookBulkOperationsTest(APITestCase):
+    """Pruebas para el borrado y la actualización masiva por filtros"""
+
+    def setUp(self):
+        for i in range(12):
+            Book.objects.create(
+                title=f'Libro {i}',
+                author=f'Autor {i}',
+                isbn=f'978-84-376-{i:04d}-{i % 10}',
+                cost_usd=Decimal('10.00'),
+                stock_quantity=i,
+                category='Ficción' if i % 2 else 'Historia',
+                supplier_country='AR' if i < 6 else 'ES'
+            )
+        self.delete_url = reverse('book-bulk-delete')
+        self.update_url = reverse('book-bulk-update')
+
+    def test_bulk_delete_dry_run(self):
+        """Prueba: el dry-run devuelve la cantidad afectada sin borrar"""
+        response = self.client.post(
+            self.delete_url, {'filters': {'supplier_country': 'AR'}, 'dry_run': True}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'matched': 6, 'dry_run': True})
+        self.assertEqual(Book.objects.count(), 12)
+
+    def test_bulk_delete_in_chunks(self):
+        """Prueba: el borrado se ejecuta en bloques acotados"""
+        response = self.client.post(
+            self.delete_url,
+            {'filters': {'supplier_country': 'AR', 'threshold': 5}, 'chunk_size': 2},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'deleted': 5, 'chunks': 3})
+        self.assertEqual(Book.objects.count(), 7)
+
+    def test_bulk_update_by_ids(self):
+        """Prueba: actualizar categoría de una lista de libros"""
+        ids = list(Book.objects.filter(category='Historia').values_list('id', flat=True)[:3])
+        response = self.client.post(
+            self.update_url,
+            {'filters': {'ids': ids}, 'patch': {'category': 'Ensayo', 'cost_usd': '11.50'}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'updated': 3, 'chunks': 1})
+        self.assertEqual(
+            list(Book.objects.filter(category='Ensayo').values_list('id', flat=True)), ids
+        )
+        self.assertEqual(Book.objects.filter(cost_usd=Decimal('11.50')).count(), 3)
+
+    def test_bulk_operations_recheck_filters_per_chunk(self):
+        """Prueba: una fila que dejó de cumplir los filtros no se modifica ni se borra"""
+        outsider = Book.objects.get(supplier_country='ES', stock_quantity=11)
+        original = BookViewSet.run_in_chunks
+
+        def with_stale_id(view, queryset, chunk_size, apply):
+            # Simula un id leído antes de que la fila cambiara y dejara de coincidir
+            return original(view, queryset, chunk_size, lambda ids: apply(ids + [outsider.pk]))
+
+        with patch.object(BookViewSet, 'run_in_chunks', with_stale_id):
+            response = self.client.post(
+                self.update_url,
+                {'filters': {'supplier_country': 'AR'}, 'patch': {'stock_quantity': 50}},
+                format='json'
+            )
+            self.assertEqual(response.data, {'updated': 6, 'chunks': 1})
+            self.assertEqual(BookHistory.objects.count(), 6)
+            self.assertFalse(BookHistory.objects.filter(book=outsider).exists())
+
+            response = self.client.post(
+                self.delete_url, {'filters': {'supplier_country': 'AR'}}, format='json'
+            )
+            self.assertEqual(response.data, {'deleted': 6, 'chunks': 1})
+
+        outsider.refresh_from_db()
+        self.assertEqual(outsider.stock_quantity, 11)
+
+    def test_unknown_filter_keys_rejected(self):
+        """Prueba: un filtro o campo mal escrito devuelve 400 y no borra nada"""
+        cases = [
+            {'filters': {'category': 'Ficción', 'suplier_country': 'AR'}},
+            {'filters': {'category': 'Ficción'}, 'dryrun': True},
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                response = self.client.post(self.delete_url, data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.update_url, {
+            'filters': {'category': 'Ficción', 'suplier_country': 'AR'},
+            'patch': {'stock_quantity': 0},
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('filters', response.data)
+        self.assertEqual(Book.objects.count(), 12)
+        self.assertFalse(Book.objects.filter(stock_quantity=0, category='Ficción').exists())
+
+    def test_bulk_update_validation(self):
+        """Prueba: el patch se valida con las mismas reglas que BookSerializer"""
+        cases = [
+            {'filters': {'category': 'Ficción'}, 'patch': {'stock_quantity': -1}},
+            {'filters': {'category': 'Ficción'}, 'patch': {'cost_usd': '0'}},
+            {'filters': {'category': 'Ficción'}, 'patch': {'isbn': '978-84-376-9999-9'}},
+            {'filters': {'category': 'Ficción'}, 'patch': {'created_at': '2020-01-01T00:00:00Z'}},
+            {'filters': {}, 'patch': {'stock_quantity': 1}},
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                response = self.client.post(self.update_url, data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Book.objects.filter(stock_quantity=-1).exists())
+
+
+class BookAdminTest(QueryBudgetMixin, TestCase):
+    """Pruebas para el admin de libros"""
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'clave-segura')
+        self.client.force_login(self.admin_user)
+        for i in range(30):
+            Book.objects.create(
+                title=f'Libro {i}',
+                author=f'Autor {i}',
+                isbn=f'978-84-376-{i:04d}-{i % 10}',
+                cost_usd=Decimal('10.00'),
+                stock_quantity=i,
+                category='Ficción' if i % 2 else 'Historia',
+                supplier_country='AR' if i < 10 else 'ES'
+            )
+        self.changelist_url = reverse('admin:inventory_book_changelist')
+
+    def test_changelist_query_budget(self):
+        """Prueba: el listado del admin no crece en consultas con filtros ni búsqueda"""
+        for params in ({}, {'category': 'Ficción'}, {'supplier_country': 'AR', 'p': 1},
+                       {'q': '978-84-376-0003-3'}):
+            with self.subTest(params=params):
+                with self.assertQueryBudget(max_queries=6, max_rows=102):
+                    response = self.client.get(self.changelist_url, params)
+                self.assertEqual(response.status_code, 200)
+
+    def test_isbn_search_is_exact(self):
+        """Prueba: la búsqueda solo encuentra el ISBN exacto"""
+        response = self.client.get(self.changelist_url, {'q': '978-84-376-0003-3'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        response = self.client.get(self.changelist_url, {'q': '978-84-376'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_change_form_records_stock_history(self):
+        """Prueba: editar el stock desde el formulario del admin queda en el historial"""
+        book = Book.objects.get(stock_quantity=3)
+        data = {
+            'title': book.title, 'author': book.author, 'isbn': book.isbn,
+            'cost_usd': book.cost_usd, 'stock_quantity': book.stock_quantity,
+            'category': book.category, 'supplier_country': book.supplier_country,
+        }
+        url = reverse('admin:inventory_book_change', args=[book.pk])
+        response = self.client.post(url, {**data, 'title': 'Otro título'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(BookHistory.objects.exists())
+
+        self.client.post(url, {**data, 'stock_quantity': 40})
+        self.assertEqual(
+            list(BookHistory.objects.values_list('book_id', 'field', 'value')),
+            [(book.pk, BookHistory.FIELD_STOCK, Decimal('40'))]
+        )
+
+    def _run_action(self, action, queryset, **extra):
+        data = {
+            'action': action,
+            '_selected_action': [str(pk) for pk in queryset.values_list('pk', flat=True)],
+            **extra
+        }
+        return self.client.post(self.changelist_url, data)
+
+    def test_adjust_stock_and_recategorize_actions(self):
+        """Prueba: las acciones masivas se aplican como un único UPDATE más el historial"""
+        selected = Book.objects.filter(supplier_country='AR')
+        with self.assertQueryBudget(max_queries=9):
+            response = self._run_action('adjust_stock', selected, amount=-5)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(Book.objects.filter(supplier_country='AR').values_list('stock_quantity', flat=True)),
+            [0, 0, 0, 0, 0, 0, 1, 2, 3, 4]
+        )
+
+        self._run_action('recategorize', selected, category='Importados')
+        self.assertEqual(Book.objects.filter(category='Importados').count(), 10)
+
+    @patch('inventory.pricing.requests.get')
+    def test_reprice_action(self, mock_get):
+        """Prueba: recalcular precios desde el admin usa la misma fórmula que la API"""
+        mock_get.return_value = Mock(json=Mock(return_value={'rates': {'VES': 0.85}}))
+        self._run_action('reprice', Book.objects.filter(category='Historia'))
+        self.assertEqual(Book.objects.filter(selling_price_local=Decimal('11.90')).count(), 15)
+        self.assertEqual(Book.objects.filter(selling_price_local__isnull=True).count(), 15)
+
+    @patch('inventory.pricing.requests.get')
+    def test_reprice_action_without_exchange_rate(self, mock_get):
+        """Prueba: si la API de tasas falla el admin muestra un error y no cambia precios"""
+        mock_get.side_effect = requests.RequestException('API no disponible')
+        response = self._run_action('reprice', Book.objects.all())
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Book.objects.filter(selling_price_local__isnull=False).exists())
+        self.assertFalse(BookHistory.objects.exists())
+
+        errors = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertTrue(any('tasa de cambio' in m for m in errors), errors)
+
+
+class ResponseEncodingTest(APITestCase):
+    """Pruebas para los formatos alternativos y la compresión de respuestas"""
+
+    def setUp(self):
+        caches['default'].clear()
+        for i in range(30):
+            Book.objects.create(
+                title=f'Libro {i}',
+                author=f'Autor {i}',
+                isbn=f'978-84-376-{i:04d}-{i % 10}',
+                cost_usd=Decimal('10.50'),
+                stock_quantity=i,
+                category='Ficción',
+                supplier_country='ES'
+            )
+        self.list_url = reverse('book-list')
+
+    def test_fast_json_matches_standard_renderer(self):
+        """Prueba: el renderer JSON rápido produce el mismo cuerpo que el estándar"""
+        data = BookSerializer(Book.objects.all(), many=True).data
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+        data = {
+            'ts': timezone.now(),
+            'errors': {0: ['Valor inválido'], 'ids': {1: ['Debe ser positivo']}},
+            'title': 'línea\u2028separada\u2029',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_list_field_errors_render_as_json(self):
+        """Prueba: los errores de ListField (claves enteras) se devuelven como 400"""
+        response = self.client.post(
+            reverse('book-bulk-delete'), {'filters': {'ids': [0]}}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('0', json.loads(response.content)['filters']['ids'])
+
+    def test_messagepack_negotiation(self):
+        """Prueba: se puede pedir la lista en MessagePack"""
+        response = self.client.get(self.list_url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        payload = msgpack.unpackb(response.content)
+        self.assertEqual(payload['count'], 30)
+        self.assertEqual(payload['results'][0]['cost_usd'], '10.50')
+
+    def test_compression_by_accept_encoding(self):
+        """Prueba: las respuestas grandes se comprimen con brotli o gzip"""
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(response.content))['count'], 30)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 30)
+
+        response = self.client.get(self.list_url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        for refused in ('gzip;q=0.0', 'gzip; q=0', 'br;q=0, gzip;q=0.000'):
+            with self.subTest(accept_encoding=refused):
+                response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING=refused)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='br; q=0, gzip; q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_only_api_responses_are_compressed(self):
+        """Prueba: las páginas HTML fuera de /api/ (admin con CSRF) no se comprimen"""
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'clave-segura')
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:inventory_book_add'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(response.content), 1024)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_responses_are_not_compressed(self):
+        """Prueba: no se comprimen respuestas por debajo del umbral"""
+        book = Book.objects.first()
+        response = self.client.get(
+            reverse('book-detail', kwargs={'pk': book.pk}), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cacheable_responses_stored_compressed(self):
+        """Prueba: un cuerpo idéntico reutiliza la versión comprimida del cache sin recomprimir"""
+        self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip')
+        with patch('inventory.middleware.gzip.compress') as mock_compress:
+            response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip')
+        mock_compress.assert_not_called()
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 30)
+
+
+class BookHistoryTest(APITestCase):
+    """Pruebas para el historial de precio y stock"""
+
+    def setUp(self):
+        self.book = Book.objects.create(
+            title='El Quijote',
+            author='Miguel de Cervantes',
+            isbn='978-84-376-0494-7',
+            cost_usd=Decimal('15.99'),
+            stock_quantity=25,
+            category='Literatura Clásica',
+            supplier_country='ES'
+        )
+        self.detail_url = reverse('book-detail', kwargs={'pk': self.book.pk})
+        self.history_url = reverse('book-history', kwargs={'pk': self.book.pk})
+
+    @patch('inventory.pricing.requests.get')
+    def test_price_and_stock_changes_are_recorded(self, mock_get):
+        """Prueba: calcular precio y cambiar stock agregan filas al historial"""
+        mock_get.return_value = Mock(json=Mock(return_value={'rates': {'VES': 0.85}}))
+        self.client.post(reverse('book-calculate-price', kwargs={'pk': self.book.pk}))
+        self.client.patch(self.detail_url, {'stock_quantity': 20}, format='json')
+        self.client.patch(self.detail_url, {'title': 'Don Quijote'}, format='json')
+
+        response = self.client.get(self.history_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        points = [(p['field'], p['value'], p['exchange_rate']) for p in response.data['points']]
+        self.assertEqual(points, [
+            ('selling_price_local', '19.03', '0.850000'),
+            ('stock_quantity', 20, None),
+        ])
+        self.assertFalse(response.data['truncated'])
+        for point in response.json()['points']:
+            self.assertRegex(point['ts'], r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z$')
+
+    def test_bulk_update_records_history(self):
+        """Prueba: la actualización masiva registra el nuevo stock por libro"""
+        self.client.post(
+            reverse('book-bulk-update'),
+            {'filters': {'ids': [self.book.pk]}, 'patch': {'stock_quantity': 3}},
+            format='json'
+        )
+        self.assertEqual(
+            list(BookHistory.objects.values_list('field', 'value')),
+            [(BookHistory.FIELD_STOCK, Decimal('3'))]
+        )
+
+    def test_range_query(self):
+        """Prueba: filtrar el historial por rango de fechas y campo"""
+        base = timezone.now() - timedelta(days=10)
+        BookHistory.objects.bulk_create([
+            BookHistory(book=self.book, ts=base + timedelta(days=i),
+                        field=BookHistory.FIELD_STOCK, value=30 - i)
+            for i in range(5)
+        ] + [BookHistory(book=self.book, ts=base, field=BookHistory.FIELD_PRICE, value=Decimal('19.03'))])
+
+        response = self.client.get(self.history_url, {
+            'from': (base + timedelta(days=1)).isoformat(),
+            'to': (base + timedelta(days=4)).isoformat(),
+            'field': 'stock',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['value'] for p in response.data['points']], [29, 28, 27])
+
+        response = self.client.get(self.history_url, {'limit': 2})
+        self.assertEqual(len(response.data['points']), 2)
+        self.assertTrue(response.data['truncated'])
+
+        response = self.client.get(self.history_url, {
+            'from': base.isoformat(), 'to': (base - timedelta(days=1)).isoformat()
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_compaction_rolls_up_daily(self):
+        """Prueba: la compactación agrega días antiguos y conserva los recientes"""
+        old_day = timezone.now() - timedelta(days=100)
+        values = [Decimal('10.00'), Decimal('12.50'), Decimal('9.00'), Decimal('11.00')]
+        BookHistory.objects.bulk_create([
+            BookHistory(book=self.book, ts=old_day.replace(hour=8 + i), field=BookHistory.FIELD_PRICE, value=v)
+            for i, v in enumerate(values)
+        ] + [BookHistory(book=self.book, ts=timezone.now(), field=BookHistory.FIELD_PRICE, value=Decimal('13.00'))])
+
+        call_command('compact_book_history', older_than_days=90, stdout=StringIO())
+
+        self.assertEqual(BookHistory.objects.count(), 1)
+        daily = BookHistoryDaily.objects.get()
+        self.assertEqual(
+            (daily.open, daily.close, daily.min, daily.max, daily.samples),
+            (Decimal('10.00'), Decimal('11.00'), Decimal('9.00'), Decimal('12.50'), 4)
+        )
+
+        response = self.client.get(self.history_url)
+        self.assertEqual(len(response.data['points']), 1)
+        self.assertEqual(response.data['daily'][0]['max'], '12.50')
+        self.assertEqual(response.data['daily'][0]['samples'], 4)
+        self.assertEqual(response.data['daily'][0]['day'], daily.day.isoformat())
@@ -0,0 +1,96 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle de cubeta de tokens por cliente.
+
+    La tasa ``"N/periodo"`` define una cubeta de N tokens que se rellena de
+    forma continua (N por periodo), de modo que se permiten ráfagas cortas
+    sin superar el promedio. El estado vive en el cache ``THROTTLE_CACHE_ALIAS``,
+    que puede ser local (LocMem) o compartido entre procesos (Memcached, Redis,
+    base de datos). La lectura y escritura no son atómicas: bajo concurrencia
+    alta el límite es aproximado, a cambio de una sola ida y vuelta al cache.
+    """
+
+    scope = None
+    timer = time.time
+    cache_format = 'throttle_tb_%(scope)s_%(ident)s'
+    THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_cache_key(self, request, view, scope):
+        if request.user and request.user.is_authenticated:
+            ident = f'user-{request.user.pk}'
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': scope, 'ident': ident}
+
+    def parse_rate(self, scope):
+        rate = self.THROTTLE_RATES.get(scope)
+        if rate is None:
+            return None
+        try:
+            num, period = rate.split('/')
+            duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+            return int(num), duration
+        except (ValueError, KeyError, IndexError):
+            raise ImproperlyConfigured(f"Tasa inválida para el scope '{scope}': {rate}")
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        parsed = self.parse_rate(scope)
+        if parsed is None:
+            return True
+
+        capacity, duration = parsed
+        refill_per_second = capacity / duration
+        key = self.get_cache_key(request, view, scope)
+        now = self.timer()
+
+        tokens, last = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * refill_per_second)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / refill_per_second
+            return False
+
+        self.cache.set(key, (tokens - 1, now), math.ceil(duration))
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ClientRateThrottle(TokenBucketThrottle):
+    """Presupuesto global por cliente para toda la API."""
+    scope = 'client'
+
+
+class ActionRateThrottle(TokenBucketThrottle):
+    """Presupuesto por cliente y acción.
+
+    La vista declara ``throttle_action_scopes`` (acción -> scope) para dar a
+    las acciones costosas su propio presupuesto; las acciones que no aparecen
+    solo quedan sujetas al límite global.
+    """
+
+    def get_scope(self, request, view):
+        scopes = getattr(view, 'throttle_action_scopes', {})
+        return scopes.get(getattr(view, 'action', None))
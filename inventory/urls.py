@@ -4,6 +4,7 @@ from . import views
 
 router = DefaultRouter()
 router.register(r'books', views.BookViewSet)
+router.register(r'jobs', views.JobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,14 +1,19 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, serializers, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter
-import requests
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
 
-from .models import Book
-from .serializers import BookSerializer
+from . import jobs, pricing, renderers
+from .history import FIELD_NAMES, HistoryBuffer
+from .models import Book, BookHistory, BookHistoryDaily, Job
+from .serializers import (
+    BookBulkDeleteSerializer, BookBulkUpdateSerializer, BookHistoryQuerySerializer,
+    BookSerializer, JobSerializer
+)
 
 class BookViewSet(viewsets.ModelViewSet):
     queryset = Book.objects.all()
@@ -16,6 +21,19 @@ class BookViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, SearchFilter]
     search_fields = ['title', 'author', 'category', 'isbn']
     filterset_fields = ['category', 'supplier_country']
+    renderer_classes = renderers.book_renderer_classes()
+    # Presupuestos separados para las acciones costosas (ver inventory.throttling)
+    throttle_action_scopes = {
+        'list': 'books-list',
+        'create': 'books-write',
+        'update': 'books-write',
+        'partial_update': 'books-write',
+        'destroy': 'books-write',
+        'calculate_price': 'calculate-price',
+        'history': 'books-list',
+        'bulk_delete': 'books-bulk',
+        'bulk_update': 'books-bulk',
+    }
 
     def get_queryset(self):
         queryset = Book.objects.all()
@@ -28,6 +46,91 @@ class BookViewSet(viewsets.ModelViewSet):
             
         return queryset
 
+    def perform_create(self, serializer):
+        book = serializer.save()
+        with HistoryBuffer() as history:
+            history.stock(book.id, book.stock_quantity)
+            history.price(book.id, book.selling_price_local)
+
+    def perform_update(self, serializer):
+        old_stock = serializer.instance.stock_quantity
+        old_price = serializer.instance.selling_price_local
+        book = serializer.save()
+        with HistoryBuffer() as history:
+            if book.stock_quantity != old_stock:
+                history.stock(book.id, book.stock_quantity)
+            if book.selling_price_local != old_price:
+                history.price(book.id, book.selling_price_local)
+
+    def run_in_chunks(self, queryset, chunk_size, apply):
+        """Aplica ``apply`` a bloques de ids en transacciones cortas.
+
+        Los bloques se recorren por clave primaria (sin OFFSET), así cada
+        transacción bloquea como máximo ``chunk_size`` filas. ``apply`` debe
+        volver a filtrar con ``queryset``: una fila puede dejar de coincidir
+        entre la lectura de los ids y su transacción.
+        """
+        total = chunks = 0
+        last_id = 0
+        while True:
+            ids = list(
+                queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                total += apply(ids)
+            chunks += 1
+            last_id = ids[-1]
+        return total, chunks
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        serializer = BookBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = serializer.fields['filters'].filter_queryset(
+            Book.objects.all(), serializer.validated_data['filters']
+        )
+        if serializer.validated_data['dry_run']:
+            return Response({"matched": queryset.count(), "dry_run": True})
+
+        deleted, chunks = self.run_in_chunks(
+            queryset, serializer.validated_data['chunk_size'],
+            lambda ids: queryset.filter(pk__in=ids).delete()[1].get(Book._meta.label, 0)
+        )
+        return Response({"deleted": deleted, "chunks": chunks}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        serializer = BookBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = serializer.fields['filters'].filter_queryset(
+            Book.objects.all(), serializer.validated_data['filters']
+        )
+        if serializer.validated_data['dry_run']:
+            return Response({"matched": queryset.count(), "dry_run": True})
+
+        patch = {**serializer.validated_data['patch'], 'updated_at': timezone.now()}
+
+        def apply(ids):
+            # Se bloquean solo las filas que aún cumplen los filtros; el historial registra esas
+            matched = list(
+                queryset.filter(pk__in=ids).select_for_update().values_list('pk', flat=True)
+            )
+            updated = Book.objects.filter(pk__in=matched).update(**patch)
+            with HistoryBuffer() as history:
+                for book_id in matched:
+                    if 'stock_quantity' in patch:
+                        history.stock(book_id, patch['stock_quantity'])
+                    if 'selling_price_local' in patch:
+                        history.price(book_id, patch['selling_price_local'])
+            return updated
+
+        updated, chunks = self.run_in_chunks(
+            queryset, serializer.validated_data['chunk_size'], apply
+        )
+        return Response({"updated": updated, "chunks": chunks}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], url_path='calculate-price')
     def calculate_price(self, request, pk=None):
         try:
@@ -41,20 +144,23 @@ class BookViewSet(viewsets.ModelViewSet):
         try:
             exchange_rate = self.get_exchange_rate()
      
-            cost_local = float(book.cost_usd) * exchange_rate
-            selling_price_local = cost_local * 1.4 
+            cost_local, selling_price_local = pricing.calculate_selling_price(
+                book.cost_usd, exchange_rate
+            )
             
             book.selling_price_local = selling_price_local
             book.save()
+            with HistoryBuffer() as history:
+                history.price(book.id, selling_price_local, exchange_rate)
 
             calculation_data = {
                 "book_id": book.id,
                 "cost_usd": float(book.cost_usd),
                 "exchange_rate": exchange_rate,
                 "cost_local": round(cost_local, 2),
-                "margin_percentage": 40,
+                "margin_percentage": pricing.MARGIN_PERCENTAGE,
                 "selling_price_local": round(selling_price_local, 2),
-                "currency": "VES",
+                "currency": pricing.CURRENCY,
                 "calculation_timestamp": timezone.now().isoformat()
             }
 
@@ -70,17 +176,83 @@ class BookViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        query = BookHistoryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        book_id = self.get_object().pk
+
+        points = BookHistory.objects.filter(book_id=book_id)
+        daily = BookHistoryDaily.objects.filter(book_id=book_id)
+        if 'from' in params:
+            points = points.filter(ts__gte=params['from'])
+            daily = daily.filter(day__gte=timezone.localdate(params['from']))
+        if 'to' in params:
+            points = points.filter(ts__lt=params['to'])
+            daily = daily.filter(day__lte=timezone.localdate(params['to']))
+        if 'field' in params:
+            points = points.filter(field=params['field'])
+            daily = daily.filter(field=params['field'])
+
+        limit = params['limit']
+        # values_list devuelve datetime/date crudos; se formatean como en los serializers
+        ts_field, day_field = serializers.DateTimeField(), serializers.DateField()
+        rows = list(points.order_by('ts', 'id').values_list(
+            'ts', 'field', 'value', 'exchange_rate'
+        )[:limit + 1])
+        return Response({
+            "book_id": book_id,
+            "points": [
+                {
+                    "ts": ts_field.to_representation(ts),
+                    "field": FIELD_NAMES[field],
+                    "value": int(value) if field == BookHistory.FIELD_STOCK else str(value),
+                    "exchange_rate": str(rate) if rate is not None else None,
+                }
+                for ts, field, value, rate in rows[:limit]
+            ],
+            "truncated": len(rows) > limit,
+            "daily": [
+                {
+                    "day": day_field.to_representation(row.day),
+                    "field": FIELD_NAMES[row.field],
+                    "open": str(row.open),
+                    "close": str(row.close),
+                    "min": str(row.min),
+                    "max": str(row.max),
+                    "samples": row.samples,
+                }
+                for row in daily.order_by('day', 'field')
+            ],
+        })
+
     def get_exchange_rate(self):
-        try:
-            response = requests.get(
-                'https://api.exchangerate-api.com/v4/latest/USD', 
-                timeout=10
+        return pricing.get_exchange_rate()
+
+class JobViewSet(mixins.CreateModelMixin,
+                 mixins.ListModelMixin,
+                 mixins.RetrieveModelMixin,
+                 viewsets.GenericViewSet):
+    """Tareas en segundo plano; las ejecuta el comando ``run_jobs``."""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['kind', 'status']
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        if not jobs.cancel(job):
+            return Response(
+                {"error": "La tarea ya finalizó"},
+                status=status.HTTP_409_CONFLICT
             )
-            response.raise_for_status()
-            data = response.json()
-            return data['rates']['VES']
-        except (requests.RequestException, KeyError, ValueError) as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Error fetching exchange rate: {e}. Using default rate 0.85")
-            return 0.85
\ No newline at end of file
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=status.HTTP_200_OK)